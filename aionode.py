@@ -0,0 +1,359 @@
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from codec import MEDIA_TYPE, CHAIN_MIMETYPES, CodecError, decode_block, decode_transaction
+
+# Alternatywny serwer noda na asyncio (sama biblioteka standardowa): jedno gniazdo obsługuje
+# tysiące połączeń keep-alive, a wszystko, co blokuje (blokady łańcucha, SQLite, pliki, weryfikacja,
+# synchronizacja z peerami), trafia do puli wątków — pętla zdarzeń nigdy nie czeka na dysk ani sieć.
+# Logika żądań jest wspólna z trasami Flaska (metody Blockchain zwracające (odpowiedź, kod HTTP)).
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+KEEPALIVE_TIMEOUT = 30
+# Ile fragmentów /chain czytamy z magazynu w jednym zadaniu puli wątków
+STREAM_BATCH = 64
+
+STATUS_TEXT = {
+    200: "OK", 201: "Created", 202: "Accepted", 304: "Not Modified",
+    400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+    413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error"
+}
+
+
+def _take(iterator, count):
+    batch = []
+    for chunk in iterator:
+        if chunk:
+            batch.append(chunk)
+        if len(batch) == count:
+            break
+    return batch
+
+
+class Request:
+    def __init__(self, method, target, headers, body=b""):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = unquote(parts.path)
+        self.args = {k: v[0] for k, v in parse_qs(parts.query, keep_blank_values=True).items()}
+        self.headers = headers
+        self.body = body
+
+    @property
+    def mimetype(self):
+        return self.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    @property
+    def source(self):
+        return self.headers.get("x-node-address")
+
+    def arg(self, name, default=None, type=str):
+        """Jak request.args.get we Flasku: zła wartość daje wartość domyślną."""
+        if name not in self.args:
+            return default
+        try:
+            return type(self.args[name])
+        except ValueError:
+            return default
+
+    def json(self):
+        try:
+            return json.loads(self.body)
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    def payload(self, decode):
+        """Treść żądania: JSON albo format binarny (Content-Type: application/x-blockchain)."""
+        if self.mimetype == MEDIA_TYPE:
+            try:
+                return decode(self.body)
+            except CodecError:
+                return None
+        return self.json()
+
+    def best_match(self, offers):
+        """Najlepiej pasujący format z nagłówka Accept (remis wygrywa wcześniejszy na liście)."""
+        accepted = []
+        for item in self.headers.get("accept", "").split(","):
+            value, _, params = item.partition(";")
+            quality = 1.0
+            for param in params.split(";"):
+                key, _, number = param.strip().partition("=")
+                if key == "q":
+                    try:
+                        quality = float(number)
+                    except ValueError:
+                        quality = 0.0
+            if value.strip():
+                accepted.append((value.strip().lower(), quality))
+
+        best, best_quality = None, 0.0
+        for offer in offers:
+            kind = offer.split("/")[0]
+            for value, quality in accepted:
+                if value in (offer, f"{kind}/*", "*/*") and quality > best_quality:
+                    best, best_quality = offer, quality
+        return best
+
+    def if_none_match(self):
+        return {tag.strip().removeprefix("W/").strip('"') for tag in self.headers.get("if-none-match", "").split(",")}
+
+
+class AsyncNode:
+    def __init__(self, blockchain, workers=32):
+        self.blockchain = blockchain
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aionode")
+        self.connections = 0
+
+        routes = [
+            ("GET", r"/mine", self.mine),
+            ("GET", r"/mine/(?P<job_id>[^/]+)", self.mining_status),
+            ("GET", r"/chain", self.chain),
+            ("GET", r"/headers", self.headers),
+            ("GET", r"/blocks", self.blocks),
+            ("POST", r"/register_node", self.register_node),
+            ("POST", r"/verify_node", self.verify_node),
+            ("GET", r"/sync", self.sync),
+            ("POST", r"/new_block", self.new_block),
+            ("GET", r"/stats", self.stats),
+            ("POST", r"/cmpctblock", self.compact_block),
+            ("POST", r"/blocktxn", self.block_transactions),
+            ("POST", r"/inv", self.inventory),
+            ("GET", r"/proof/(?P<tx_hash>[^/]+)", self.proof),
+            ("GET", r"/block/height/(?P<height>\d+)", self.block_by_height),
+            ("GET", r"/block/(?P<block_hash>[^/]+)", self.block_by_hash),
+            ("GET", r"/tx/(?P<tx_hash>[^/]+)", self.transaction_lookup),
+            ("GET", r"/nodes", self.nodes),
+            ("GET", r"/balance", self.balance),
+            ("GET", r"/history/(?P<node_id>[^/]+)", self.history),
+            ("POST", r"/transaction", self.transaction),
+        ]
+        self.routes = [(method, re.compile(pattern + r"/?\Z"), handler) for method, pattern, handler in routes]
+
+    async def call(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    # --- trasy ---
+
+    async def mine(self, request):
+        return await self.call(self.blockchain.mine)
+
+    async def mining_status(self, request, job_id):
+        return self.blockchain.mining_status(job_id)
+
+    async def chain(self, request):
+        # Jeden odczyt widoku — długość, czubek i trudność pochodzą z tego samego stanu łańcucha
+        blockchain = self.blockchain
+        view = blockchain.view
+        start, stop = blockchain.chain_range(view, request.arg("from", 0, int), request.arg("limit", None, int))
+        mimetype = request.best_match(CHAIN_MIMETYPES) or "application/json"
+
+        etag = blockchain.chain_etag(view, start, stop, mimetype)
+        headers = {"ETag": f'"{etag}"', "Vary": "Accept"}
+        if etag in request.if_none_match():
+            return Response(b"", 304, headers=headers)
+        return Response(blockchain.chain_chunks(view, start, stop, mimetype), 200, mimetype, headers)
+
+    async def headers(self, request):
+        return await self.call(self.blockchain.headers_page, self.blockchain.view, request.arg("from", 0, int), request.arg("to", None, int))
+
+    async def blocks(self, request):
+        return await self.call(self.blockchain.blocks_page, self.blockchain.view, request.arg("from", 0, int), request.arg("to", None, int))
+
+    async def register_node(self, request):
+        return self.blockchain.issue_challenges(request.json())
+
+    async def verify_node(self, request):
+        return await self.call(self.blockchain.verify_challenge, request.json())
+
+    async def sync(self, request):
+        return await self.call(self.blockchain.sync_chain)
+
+    async def new_block(self, request):
+        return await self.call(self.blockchain.receive_block, request.payload(decode_block), request.source)
+
+    async def stats(self, request):
+        return self.blockchain.stats()
+
+    async def compact_block(self, request):
+        return await self.call(self.blockchain.receive_compact_block, request.json(), request.source)
+
+    async def block_transactions(self, request):
+        return await self.call(self.blockchain.receive_block_transactions, request.json(), request.source)
+
+    async def inventory(self, request):
+        return await self.call(self.blockchain.receive_inventory, request.json(), request.source)
+
+    async def proof(self, request, tx_hash):
+        return await self.call(self.blockchain.transaction_proof, tx_hash)
+
+    async def block_by_height(self, request, height):
+        return await self.call(self.blockchain.block_by_height, int(height))
+
+    async def block_by_hash(self, request, block_hash):
+        return await self.call(self.blockchain.block_by_hash, block_hash)
+
+    async def transaction_lookup(self, request, tx_hash):
+        return await self.call(self.blockchain.transaction_lookup, tx_hash)
+
+    async def nodes(self, request):
+        return {"nodes": list(self.blockchain.nodes)}, 200
+
+    async def balance(self, request):
+        return await self.call(self.blockchain.balance, request.arg("node_id"))
+
+    async def history(self, request, node_id):
+        return await self.call(self.blockchain.history_page, node_id, request.arg("cursor"), request.arg("limit", 50, int))
+
+    async def transaction(self, request):
+        return await self.call(self.blockchain.receive_transaction, request.payload(decode_transaction), request.source)
+
+    # --- HTTP/1.1 ---
+
+    async def dispatch(self, request):
+        allowed = False
+        for method, pattern, handler in self.routes:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed = True
+                continue
+            try:
+                result = await handler(request, **match.groupdict())
+            except Exception as e:
+                print(f"❌ Błąd obsługi {request.method} {request.path}: {e}")
+                return Response("Internal Server Error", 500)
+            if isinstance(result, Response):
+                return result
+            body, status = result
+            return Response(body, status)
+
+        if allowed:
+            return Response("Method Not Allowed", 405)
+        return Response("Not Found", 404)
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEPALIVE_TIMEOUT)
+                except asyncio.LimitOverrunError:
+                    await Response("Request Header Fields Too Large", 431).send(writer, self, False)
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await Response("Bad Request", 400).send(writer, self, False)
+                    break
+
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+                if "transfer-encoding" in headers:
+                    await Response("Length Required", 411).send(writer, self, False)
+                    break
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    await Response("Payload Too Large", 413).send(writer, self, False)
+                    break
+
+                try:
+                    body = await reader.readexactly(length) if length else b""
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                response = await self.dispatch(Request(method, target, headers, body))
+                # Klient HTTP/1.0 nie zna kodowania chunked — strumień kończy u niego zamknięcie połączenia
+                chunked = version == "HTTP/1.1"
+                if not chunked and response.streamed:
+                    keep_alive = False
+                await response.send(writer, self, keep_alive, chunked)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES, backlog=4096)
+        print(f"⚡ Serwer asyncio nasłuchuje na {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+class Response:
+    def __init__(self, body, status=200, mimetype=None, headers=None):
+        self.body = body
+        self.status = status
+        self.headers = dict(headers or {})
+
+        if isinstance(body, str):
+            self.body = body.encode()
+            mimetype = mimetype or "text/html; charset=utf-8"
+        elif isinstance(body, (dict, list)):
+            self.body = json.dumps(body).encode()
+            mimetype = mimetype or "application/json"
+        if mimetype:
+            self.headers["Content-Type"] = mimetype
+
+    @property
+    def streamed(self):
+        return not isinstance(self.body, bytes)
+
+    async def send(self, writer, server, keep_alive, chunked=True):
+        """Wysyła odpowiedź. Strumień bez `chunked` (HTTP/1.0) idzie bez ramek — wtedy `keep_alive` musi być False."""
+        streamed = self.streamed
+        headers = dict(self.headers)
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        if not streamed:
+            headers["Content-Length"] = str(len(self.body))
+        elif chunked:
+            headers["Transfer-Encoding"] = "chunked"
+
+        head = f"HTTP/1.1 {self.status} {STATUS_TEXT.get(self.status, 'Unknown')}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n")
+
+        if not streamed:
+            writer.write(self.body)
+            await writer.drain()
+            return
+
+        # Odpowiedź strumieniowa: fragmenty czytamy z magazynu w puli wątków, paczkami
+        chunks = iter(self.body)
+        while True:
+            batch = await server.call(_take, chunks, STREAM_BATCH)
+            for chunk in batch:
+                writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk)
+            await writer.drain()
+            if len(batch) < STREAM_BATCH:
+                break
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+
+
+def run_server(blockchain, host, port):
+    """Uruchamia serwer asyncio w bieżącym wątku, na własnej pętli zdarzeń."""
+    asyncio.run(AsyncNode(blockchain).serve(host, port))
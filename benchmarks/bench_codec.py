@@ -0,0 +1,79 @@
+"""Porównanie JSON i formatu binarnego: kodowanie, dekodowanie, hashowanie i rozmiar bloków."""
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from codec import encode_block, decode_block
+
+BLOCKS = 200
+TXS_PER_BLOCK = 50
+ROUNDS = 5
+
+
+def make_blocks():
+    # Bloki v2 z podpisami RSA-2048 (256 bajtów) — jak te, które kopie dzisiejszy node
+    blocks = []
+    for n in range(BLOCKS):
+        transactions = [
+            {
+                "sender": hashlib.sha256(b"s%d" % i).hexdigest(),
+                "receiver": hashlib.sha256(b"r%d" % i).hexdigest(),
+                "amount": 1.5 + i,
+                "timestamp": time.time(),
+                "signature": os.urandom(256).hex()
+            }
+            for i in range(TXS_PER_BLOCK)
+        ]
+        blocks.append({
+            "version": 2,
+            "index": n + 1,
+            "timestamp": time.time(),
+            "transactions": transactions,
+            "merkle_root": os.urandom(32).hex(),
+            "proof": n * 7919,
+            "previous_hash": os.urandom(32).hex(),
+            "hash": os.urandom(32).hex()
+        })
+    return blocks
+
+
+def measure(blocks, encode, decode):
+    encoded = [encode(block) for block in blocks]
+    results = {"bytes": sum(len(data) for data in encoded)}
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for block in blocks:
+            encode(block)
+    results["encode"] = BLOCKS * ROUNDS / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for data in encoded:
+            decode(data)
+    results["decode"] = BLOCKS * ROUNDS / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for block in blocks:
+            hashlib.sha256(encode(block)).digest()
+    results["hash"] = BLOCKS * ROUNDS / (time.perf_counter() - start)
+    return results
+
+
+if __name__ == "__main__":
+    blocks = make_blocks()
+    assert all(decode_block(encode_block(block)) == block for block in blocks)
+
+    json_results = measure(blocks, lambda block: json.dumps(block, sort_keys=True).encode(), json.loads)
+    binary_results = measure(blocks, encode_block, decode_block)
+
+    print(f"{BLOCKS} bloków po {TXS_PER_BLOCK} transakcji")
+    print(f"{'':10}{'JSON':>14}{'binarny':>14}")
+    print(f"{'bajty':10}{json_results['bytes']:>14,}{binary_results['bytes']:>14,}")
+    for key, label in (("encode", "kodowanie"), ("decode", "dekodowanie"), ("hash", "hash")):
+        print(f"{label:10}{json_results[key]:>12,.0f}/s{binary_results[key]:>12,.0f}/s")
@@ -0,0 +1,44 @@
+"""Weryfikacje podpisów na sekundę: parsowanie PEM przy każdym wywołaniu vs. KeyRegistry."""
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+from keys import KeyRegistry
+
+VERIFICATIONS = 2000
+
+PSS = padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH)
+
+
+def verify(public_key, signature, data):
+    public_key.verify(signature, data, PSS, hashes.SHA256())
+
+
+def bench(get_key, pem, signature, data):
+    start = time.perf_counter()
+    for _ in range(VERIFICATIONS):
+        verify(get_key("node", pem), signature, data)
+    return VERIFICATIONS / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode('utf-8')
+
+    data = json.dumps({"sender": "node", "receiver": "other", "amount": 1, "timestamp": time.time()}, sort_keys=True).encode()
+    signature = private_key.sign(data, PSS, hashes.SHA256())
+
+    registry = KeyRegistry()
+    before = bench(lambda node_id, pem: serialization.load_pem_public_key(pem.encode('utf-8')), pem, signature, data)
+    after = bench(registry.get, pem, signature, data)
+    print(f"Bez cache kluczy: {before:,.0f} weryfikacji/s")
+    print(f"Z KeyRegistry:    {after:,.0f} weryfikacji/s ({after / before:.1f}x)")
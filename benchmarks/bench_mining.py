@@ -0,0 +1,88 @@
+"""Porównanie prób nonce na sekundę: dawna pętla proof_of_work vs. szablon bloku z midstate."""
+import copy
+import hashlib
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+from difficulty import INITIAL_TARGET, target_bytes
+from mining import build_block_template, search_nonce
+
+MEMPOOL_SIZE = 20
+LEGACY_ATTEMPTS = 300
+TEMPLATES = 5
+TARGET = INITIAL_TARGET >> 8
+
+private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def sign(data):
+    return private_key.sign(
+        data.encode(),
+        padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+        hashes.SHA256()
+    ).hex()
+
+
+def make_mempool():
+    mempool = []
+    for i in range(MEMPOOL_SIZE):
+        tx = {"sender": hashlib.sha256(b"a%d" % i).hexdigest(), "receiver": hashlib.sha256(b"b%d" % i).hexdigest(),
+              "amount": 1.5, "timestamp": time.time()}
+        tx["signature"] = sign(json.dumps(tx, sort_keys=True))
+        mempool.append(tx)
+    return mempool
+
+
+def coinbase():
+    tx = {"sender": "*", "receiver": "miner", "amount": 50, "timestamp": time.time()}
+    tx["signature"] = sign(json.dumps(tx, sort_keys=True))
+    return tx
+
+
+def legacy_attempts_per_sec(previous_block, mempool):
+    # Odtworzenie dawnej pętli: deepcopy + nowy podpis nagrody + json.dumps całego bloku na każdą próbę
+    start = time.perf_counter()
+    for proof in range(LEGACY_ATTEMPTS):
+        copy_list = copy.deepcopy(mempool)
+        copy_list.append(coinbase())
+        block = {
+            "index": previous_block["index"] + 1,
+            "timestamp": time.time(),
+            "transactions": copy_list,
+            "proof": proof,
+            "previous_hash": previous_block["hash"]
+        }
+        hashlib.sha256(json.dumps(block, sort_keys=True).encode()).hexdigest()
+    return LEGACY_ATTEMPTS / (time.perf_counter() - start)
+
+
+def template_attempts_per_sec(previous_block, mempool):
+    attempts, elapsed = 0, 0.0
+    # Cel trudniejszy od początkowego (ok. 65 tys. prób na szablon) — inaczej mierzylibyśmy głównie budowę szablonu
+    target = target_bytes(TARGET)
+    for _ in range(TEMPLATES):
+        # Podpis nagrody i szablon powstają raz na blok — mierzymy tylko szukanie nonce
+        template = build_block_template(previous_block, copy.deepcopy(mempool), coinbase())
+        start = time.perf_counter()
+        nonce = search_nonce(template, target)
+        elapsed += time.perf_counter() - start
+        attempts += nonce + 1
+    return attempts / elapsed
+
+
+if __name__ == "__main__":
+    previous_block = {"index": 1, "hash": "00" + "ab" * 31}
+    mempool = make_mempool()
+
+    before = legacy_attempts_per_sec(previous_block, mempool)
+    after = template_attempts_per_sec(previous_block, mempool)
+    print(f"Mempool: {MEMPOOL_SIZE} transakcji")
+    print(f"Przed: {before:,.0f} prób/s")
+    print(f"Po:    {after:,.0f} prób/s ({after / before:.0f}x)")
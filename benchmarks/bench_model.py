@@ -0,0 +1,90 @@
+"""Pamięć bloków i transakcji: słowniki z JSON-a (przed) kontra model.Block / model.Transaction (po).
+
+Syntetyczny łańcuch bloków v2 z transakcjami o typowym kształcie (adresy 32 B, podpis RSA 256 B).
+Bajty na blok liczymy na łańcuchu bez transakcji, a bajty na transakcję z różnicy względem niego.
+Mierzymy też czas wczytania i przejścia po wszystkich transakcjach (suma kwot).
+
+    python benchmarks/bench_model.py [BLOKI] [TRANSAKCJI_NA_BLOK]
+"""
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from model import Block
+
+BLOCKS = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+TXS_PER_BLOCK = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+
+def random_hex(size):
+    return random.getrandbits(size * 8).to_bytes(size, "big").hex()
+
+
+def raw_chain(blocks, txs_per_block):
+    """Bloki jako bajty JSON — tak, jak czyta je magazyn."""
+    random.seed(1)
+    accounts = [random_hex(32) for _ in range(1000)]
+    previous_hash = "0" * 64
+    for n in range(blocks):
+        timestamp = 1700000000 + n * 10.5
+        transactions = [
+            {"sender": random.choice(accounts), "receiver": random.choice(accounts), "amount": float(random.randint(1, 100)),
+             "timestamp": timestamp + i, "signature": random_hex(256)}
+            for i in range(txs_per_block)
+        ]
+        block_hash = random_hex(32)
+        yield json.dumps({
+            "version": 2, "index": n + 1, "timestamp": timestamp, "transactions": transactions,
+            "merkle_root": random_hex(32), "proof": random.getrandbits(32), "previous_hash": previous_hash, "hash": block_hash
+        }).encode()
+        previous_hash = block_hash
+
+
+def measure(load, txs_per_block):
+    """Pamięć (w bajtach) i czas wczytania łańcucha funkcją `load`."""
+    raws = list(raw_chain(BLOCKS, txs_per_block))
+    gc.collect()
+    tracemalloc.start()
+    # Czas mierzony z włączonym tracemalloc — porównywalny tylko między postaciami
+    start = time.perf_counter()
+    chain = [load(raw) for raw in raws]
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, elapsed, chain
+
+
+def scan(chain, compact):
+    start = time.perf_counter()
+    if compact:
+        total = sum(tx.amount for block in chain for tx in block.transactions)
+    else:
+        total = sum(tx["amount"] for block in chain for tx in block["transactions"])
+    return time.perf_counter() - start, total
+
+
+if __name__ == "__main__":
+    print(f"{BLOCKS} bloków, {TXS_PER_BLOCK} transakcji na blok")
+    print(f"{'postać':10}{'B/blok':>10}{'B/tx':>10}{'razem MB':>10}{'wczytanie s':>13}{'skan ms':>10}")
+
+    loaders = {"dict": json.loads, "Block": Block.from_json}
+    for name, load in loaders.items():
+        empty, _, chain = measure(load, 0)
+        del chain
+        total, loaded, chain = measure(load, TXS_PER_BLOCK)
+        scanned, _ = scan(chain, name == "Block")
+
+        per_tx = (total - empty) / (BLOCKS * TXS_PER_BLOCK) if TXS_PER_BLOCK else 0
+        print(f"{name:10}{empty / BLOCKS:>10,.0f}{per_tx:>10,.0f}{total / 2 ** 20:>10,.1f}{loaded:>13,.1f}{scanned * 1000:>10,.0f}")
+        del chain
+
+    # Bezstratność: blok po drodze JSON -> Block -> JSON jest taki sam
+    for raw in raw_chain(1000, TXS_PER_BLOCK):
+        assert Block.from_json(raw).to_dict() == json.loads(raw)
+    print("Konwersja Block <-> JSON bezstratna (1000 bloków)")
@@ -0,0 +1,88 @@
+"""Pamięć i dysk noda pełnego i przyciętego w miarę wzrostu łańcucha.
+
+Każdy tryb działa w osobnym procesie i katalogu tymczasowym (kopia blockchain.json). Bloki z kilkoma
+syntetycznymi transakcjami dopisujemy wprost przez create_block — bez kopania i weryfikacji podpisów,
+bo mierzymy tylko to, co node trzyma w pamięci i na dysku.
+
+    python benchmarks/bench_pruned.py [BLOKI] [K]
+"""
+import contextlib
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+BLOCKS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+PRUNE_DEPTH = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+TXS_PER_BLOCK = 8
+CHECKPOINTS = 5
+
+
+def rss_mb():
+    # Bieżąca pamięć rezydentna z /proc; poza Linuksem — maksymalna z getrusage
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def disk_mb(path):
+    return sum(os.path.getsize(os.path.join(d, name)) for d, _, names in os.walk(path) for name in names) / 2 ** 20
+
+
+def run_node(prune_depth):
+    sys.path.insert(0, ROOT)
+    from main import Blockchain
+    from mining import build_block_template
+
+    from cryptography.hazmat.primitives import serialization
+    with open(os.path.join(ROOT, "default_key_public.pem"), "rb") as f:
+        public_key = serialization.load_pem_public_key(f.read())
+    public_key_pem = public_key.public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+
+    # Komunikaty noda (migracja, przycinanie) zagłuszyłyby tabelę — wiersze piszemy wprost na sys.__stdout__
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        blockchain = Blockchain("127.0.0.1:0", "bench", public_key, public_key_pem, [], prune_depth)
+        accounts = [f"{n:064x}" for n in range(1000)]
+        step = BLOCKS // CHECKPOINTS
+        start = time.perf_counter()
+
+        for n in range(1, BLOCKS + 1):
+            timestamp = time.time()
+            reward = {"sender": "*", "receiver": "bench", "amount": 50, "timestamp": timestamp, "signature": "00"}
+            transactions = [
+                {"sender": accounts[(n + i) % len(accounts)], "receiver": accounts[(n * 7 + i) % len(accounts)],
+                 "amount": 1, "timestamp": timestamp + i, "signature": "00" * 256}
+                for i in range(TXS_PER_BLOCK)
+            ]
+            template = build_block_template(blockchain.get_previous_block(), transactions, reward)
+            blockchain.create_block(template.finalize(0))
+
+            if n % step == 0:
+                print(f"{len(blockchain.chain):>9}{rss_mb():>10.1f}{disk_mb('chaindata'):>10.1f}"
+                      f"{len(blockchain.ledger.tx_hashes):>12,}{blockchain.store.prune_height:>10}"
+                      f"{n / (time.perf_counter() - start):>10,.0f}", file=sys.__stdout__, flush=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 3 and sys.argv[3] == "--node":
+        run_node(None if sys.argv[4] == "full" else PRUNE_DEPTH)
+        sys.exit()
+
+    print(f"{BLOCKS} bloków po {TXS_PER_BLOCK + 1} transakcji, węzeł przycięty trzyma {PRUNE_DEPTH} ostatnich")
+    for mode in ("full", "pruned"):
+        workdir = tempfile.mkdtemp(prefix="bench_pruned_")
+        try:
+            shutil.copy(os.path.join(ROOT, "blockchain.json"), workdir)
+            print(f"\n{mode}")
+            print(f"{'wysokość':>9}{'RSS MB':>10}{'dysk MB':>10}{'hashe tx':>12}{'przycięto':>10}{'bloków/s':>10}", flush=True)
+            subprocess.run([sys.executable, os.path.abspath(__file__), str(BLOCKS), str(PRUNE_DEPTH), "--node", mode],
+                           cwd=workdir, check=True, stdout=None, stderr=subprocess.DEVNULL)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,164 @@
+"""Porównanie serwera Flask i asyncio (aionode.py) na tym samym łańcuchu.
+
+Uruchamia dwa nody w katalogu tymczasowym (kopia blockchain.json i klucza), a potem mierzy:
+przepustowość i opóźnienia przy kilku klientach keep-alive oraz zachowanie przy wielu
+równoczesnych połączeniach.
+
+    python benchmarks/bench_server.py [KLIENCI] [POŁĄCZENIA] [SEKUNDY]
+"""
+import asyncio
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CLIENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+CONNECTIONS = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+DURATION = float(sys.argv[3]) if len(sys.argv) > 3 else 5
+REQUESTS_PER_CONNECTION = 5
+
+RUNTIMES = {"flask": 5101, "async": 5102}
+SCENARIOS = {
+    "headers": "/headers?from=0&to=10",
+    "chain": "/chain?limit=20",
+    "block": "/block/height/50",
+    "stats": "/stats",
+}
+
+
+def start_node(workdir, runtime, port):
+    # Osobny katalog na noda — każdy ma własny magazyn bloków i indeks
+    node_dir = os.path.join(workdir, runtime)
+    os.makedirs(node_dir)
+    shutil.copy(os.path.join(ROOT, "blockchain.json"), node_dir)
+    for suffix in ("private", "public"):
+        shutil.copy(os.path.join(ROOT, f"default_key_{suffix}.pem"), os.path.join(node_dir, f"bench_{suffix}.pem"))
+
+    args = [sys.executable, os.path.join(ROOT, "main.py"), str(port), "bench"] + (["async"] if runtime == "async" else [])
+    # stdin zostaje otwarte, więc menu noda czeka na input() i nie przeszkadza serwerowi
+    process = subprocess.Popen(args, cwd=node_dir, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    for _ in range(300):
+        try:
+            requests.get(f"http://127.0.0.1:{port}/stats", timeout=1)
+            return process
+        except requests.RequestException:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"Node {runtime} nie wystartował")
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0
+
+
+def throughput(port, path):
+    """Kilku klientów z sesją keep-alive wysyła żądania jedno po drugim przez DURATION sekund."""
+    latencies = []
+    failures = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + DURATION
+
+    def client():
+        session = requests.Session()
+        local = []
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            try:
+                ok = session.get(f"http://127.0.0.1:{port}{path}", timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - start)
+            else:
+                with lock:
+                    failures[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / DURATION, percentile(latencies, 0.5), percentile(latencies, 0.99), failures[0]
+
+
+async def many_connections(port):
+    """CONNECTIONS połączeń otwartych naraz; każde wysyła kilka żądań keep-alive."""
+    request = f"GET /stats HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n\r\n".encode()
+    latencies = []
+    failures = 0
+
+    async def connection():
+        nonlocal failures
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), 30)
+        except (OSError, asyncio.TimeoutError):
+            failures += REQUESTS_PER_CONNECTION
+            return
+        done = 0
+        try:
+            for _ in range(REQUESTS_PER_CONNECTION):
+                done += 1
+                start = time.perf_counter()
+                writer.write(request)
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 30)
+                length = 0
+                for line in head.decode("latin-1").split("\r\n"):
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+                if not head.startswith(b"HTTP/1.1 200"):
+                    failures += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            failures += REQUESTS_PER_CONNECTION - done + 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(CONNECTIONS)))
+    elapsed = time.perf_counter() - start
+    return len(latencies) / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99), failures
+
+
+if __name__ == "__main__":
+    # Tysiące połączeń wymagają wyższego limitu deskryptorów (dziedziczą go też nody)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    workdir = tempfile.mkdtemp(prefix="bench_server_")
+    processes = {}
+    try:
+        for runtime, port in RUNTIMES.items():
+            processes[runtime] = start_node(workdir, runtime, port)
+
+        print(f"{CLIENTS} klientów keep-alive, {DURATION:.0f} s na scenariusz")
+        print(f"{'scenariusz':12}{'serwer':>8}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'błędy':>8}")
+        for name, path in SCENARIOS.items():
+            for runtime, port in RUNTIMES.items():
+                rate, p50, p99, failures = throughput(port, path)
+                print(f"{name:12}{runtime:>8}{rate:>10,.0f}{p50 * 1000:>9.1f}{p99 * 1000:>9.1f}{failures:>8}")
+
+        print(f"\n{CONNECTIONS} równoczesnych połączeń po {REQUESTS_PER_CONNECTION} żądań /stats")
+        print(f"{'serwer':12}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'błędy':>8}")
+        for runtime, port in RUNTIMES.items():
+            rate, p50, p99, failures = asyncio.run(many_connections(port))
+            print(f"{runtime:12}{rate:>10,.0f}{p50 * 1000:>9.1f}{p99 * 1000:>9.1f}{failures:>8}")
+    finally:
+        for process in processes.values():
+            process.kill()
+            process.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
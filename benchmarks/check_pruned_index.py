@@ -0,0 +1,74 @@
+"""Sprawdzenie odbudowy indeksu na węźle przyciętym: niezgodny czubek indeksu nie może
+usunąć transakcji z przyciętych bloków — tylko po nich węzeł rozpoznaje powtórzone transakcje.
+
+    python benchmarks/check_pruned_index.py
+
+Kod wyjścia 1 oznacza, że po catch_up indeks zgubił transakcję albo nie dogonił magazynu.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from chainindex import ChainIndex
+from ledger import transaction_id
+from storage import ChainStore
+
+BLOCKS = 60
+PRUNE_HEIGHT = 40
+# Bloki indeksu od tej wysokości nie zgadzają się z magazynem (np. magazyn stracił końcówkę przy fsync "interval")
+DIVERGED_FROM = 55
+
+
+def make_block(height):
+    return {
+        "index": height + 1, "timestamp": height, "proof": 0,
+        "previous_hash": f"{height - 1:064x}" if height else "0", "hash": f"{height:064x}",
+        "transactions": [{"sender": "*", "receiver": "miner", "amount": 50, "timestamp": height, "signature": "00"}]
+    }
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix="check_pruned_index_")
+    try:
+        store = ChainStore(os.path.join(workdir, "chaindata"), fsync_policy="never", segment_size=1024)
+        index = ChainIndex(os.path.join(workdir, "index.sqlite"))
+        for height in range(BLOCKS):
+            store.append(make_block(height))
+            index.add_block(height, make_block(height))
+        store.prune(PRUNE_HEIGHT)
+        index.prune(PRUNE_HEIGHT)
+
+        # Psujemy czubek indeksu i kilka ostatnich bloków
+        index.db.execute("UPDATE meta SET value = 'diverged' WHERE key = 'tip'")
+        index.db.execute("UPDATE blocks SET hash = 'diverged' || height WHERE height >= ?", (DIVERGED_FROM,))
+        index.db.commit()
+
+        index.catch_up(store)
+
+        errors = []
+        pruned_tx = transaction_id(make_block(PRUNE_HEIGHT - 7)["transactions"][0])
+        if index.transaction_location(pruned_tx) != (PRUNE_HEIGHT - 7, 0):
+            errors.append(f"transakcja z przyciętego bloku {PRUNE_HEIGHT - 7} zniknęła z indeksu")
+        for height in range(PRUNE_HEIGHT, BLOCKS):
+            if index.block_height(f"{height:064x}") != height:
+                errors.append(f"brak bloku {height} w indeksie")
+        if index._tip() != (BLOCKS, store.hash_at(BLOCKS - 1)):
+            errors.append(f"czubek indeksu {index._tip()} nie zgadza się z magazynem")
+
+        index.close()
+        store.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for error in errors:
+        print(f"❌ {error}")
+    if errors:
+        sys.exit(1)
+    print("✅ Indeks przyciętego węzła odbudowany bez utraty transakcji")
+
+
+if __name__ == "__main__":
+    main()
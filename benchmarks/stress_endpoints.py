@@ -0,0 +1,166 @@
+"""Test obciążeniowy działającego noda: wszystkie endpointy naraz z wielu wątków.
+
+Uruchomienie (node musi działać z tym samym kluczem, żeby jego transakcje były podpisane poprawnie):
+    python main.py 5000 default_key
+    python benchmarks/stress_endpoints.py 127.0.0.1:5000 default_key 30
+
+Na końcu sprawdza spójność: żadna przyjęta transakcja nie zginęła, a /chain i /headers
+wskazują ten sam czubek. Kod wyjścia 1 oznacza błędy 5xx, wyjątki albo niespójność.
+"""
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ledger import transaction_id
+
+NODE = sys.argv[1] if len(sys.argv) > 1 else "127.0.0.1:5000"
+KEY_NAME = sys.argv[2] if len(sys.argv) > 2 else "default_key"
+DURATION = float(sys.argv[3]) if len(sys.argv) > 3 else 20
+THREADS = 4
+
+with open(f"{KEY_NAME}_private.pem", "rb") as f:
+    private_key = serialization.load_pem_private_key(f.read(), password=None)
+node_id = hashlib.sha256(private_key.public_key().public_bytes(
+    encoding=serialization.Encoding.PEM,
+    format=serialization.PublicFormat.SubjectPublicKeyInfo
+)).hexdigest()
+
+lock = threading.Lock()
+latencies = defaultdict(list)
+statuses = defaultdict(lambda: defaultdict(int))
+errors = []
+accepted = []
+stop_at = 0
+
+
+def call(name, method, path, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = requests.request(method, f"http://{NODE}{path}", timeout=30, **kwargs)
+    except requests.RequestException as e:
+        with lock:
+            errors.append(f"{name}: {e}")
+        return None
+    with lock:
+        latencies[name].append(time.perf_counter() - start)
+        statuses[name][response.status_code] += 1
+    return response
+
+
+def signed_transaction(amount):
+    tx = {"sender": node_id, "receiver": os.urandom(32).hex(), "amount": amount, "timestamp": time.time()}
+    tx["signature"] = private_key.sign(
+        json.dumps(tx, sort_keys=True).encode(),
+        padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+        hashes.SHA256()
+    ).hex()
+    return tx
+
+
+def mine_and_wait():
+    response = call("mine", "GET", "/mine")
+    if response is None or response.status_code != 202:
+        return
+    job_id = response.json()["job_id"]
+    while time.time() < stop_at + 30:
+        job = call("mine_status", "GET", f"/mine/{job_id}")
+        if job is None or job.json().get("status") != "running":
+            return
+        time.sleep(0.2)
+
+
+def transactions_worker():
+    while time.time() < stop_at:
+        tx = signed_transaction(0.01)
+        response = call("transaction", "POST", "/transaction", json=tx)
+        if response is not None and response.status_code == 201:
+            with lock:
+                accepted.append(transaction_id(tx))
+
+
+def miner_worker():
+    while time.time() < stop_at:
+        mine_and_wait()
+
+
+def sync_worker():
+    while time.time() < stop_at:
+        call("sync", "GET", "/sync")
+        time.sleep(0.5)
+
+
+def stale_block_worker():
+    # Blok na starym rodzicu — node musi go odrzucić, nie psując stanu
+    while time.time() < stop_at:
+        response = call("headers", "GET", "/headers", params={"from": 0, "to": 1})
+        if response is not None and response.status_code == 200:
+            block = call("block_height", "GET", "/block/height/0")
+            if block is not None and block.status_code == 200:
+                call("new_block", "POST", "/new_block", json=block.json()["block"])
+
+
+def reader_worker():
+    while time.time() < stop_at:
+        response = call("headers", "GET", "/headers", params={"from": 0, "to": 0})
+        length = response.json()["length"] if response is not None and response.status_code == 200 else 1
+        call("chain", "GET", "/chain", params={"from": max(0, length - 20)})
+        call("blocks", "GET", "/blocks", params={"from": max(0, length - 5)})
+        call("block_height", "GET", f"/block/height/{random.randrange(length)}")
+        call("balance", "GET", "/balance", params={"node_id": node_id})
+        call("history", "GET", f"/history/{node_id}", params={"limit": 20})
+        call("stats", "GET", "/stats")
+        with lock:
+            tx_hash = random.choice(accepted) if accepted else None
+        if tx_hash:
+            call("tx", "GET", f"/tx/{tx_hash}")
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0
+
+
+if __name__ == "__main__":
+    # Najpierw wykopujemy blok, żeby node miał środki na transakcje
+    stop_at = time.time()
+    mine_and_wait()
+
+    stop_at = time.time() + DURATION
+    workers = [transactions_worker] * THREADS + [reader_worker] * THREADS + [miner_worker, sync_worker, stale_block_worker]
+    threads = [threading.Thread(target=worker) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(f"{'endpoint':14}{'żądania':>9}{'p50 ms':>9}{'p99 ms':>9}  kody")
+    for name in sorted(latencies):
+        values = latencies[name]
+        codes = ", ".join(f"{code}×{count}" for code, count in sorted(statuses[name].items()))
+        print(f"{name:14}{len(values):>9}{percentile(values, 0.5) * 1000:>9.1f}{percentile(values, 0.99) * 1000:>9.1f}  {codes}")
+
+    # Spójność: każda przyjęta transakcja jest w mempoolu albo w łańcuchu
+    lost = [h for h in accepted if (r := call("tx", "GET", f"/tx/{h}")) is None or r.status_code != 200]
+    headers = requests.get(f"http://{NODE}/headers", params={"from": 0, "to": 0}).json()
+    chain = requests.get(f"http://{NODE}/chain", params={"from": headers["length"] - 1}).json()
+    tip_ok = chain["length"] == headers["length"] and chain["chain"][-1]["hash"] == headers["tip"]
+    server_errors = sum(count for codes in statuses.values() for code, count in codes.items() if code >= 500)
+
+    print(f"\nPrzyjęte transakcje: {len(accepted)}, zaginione: {len(lost)}")
+    print(f"Czubek /chain == /headers: {tip_ok}")
+    print(f"Błędy 5xx: {server_errors}, wyjątki: {len(errors)}")
+    for error in errors[:10]:
+        print("  ", error)
+
+    sys.exit(1 if lost or not tip_ok or server_errors or errors else 0)
@@ -0,0 +1,72 @@
+from collections import OrderedDict
+
+from model import Block
+
+
+class BlockTree:
+    """Boczne gałęzie: bloki spoza głównego łańcucha, odchodzące od niego najwyżej `max_depth` bloków pod czubkiem.
+
+    Każdy wpis zna swoją wysokość i łączną pracę gałęzi do siebie włącznie, więc wybór czubka
+    to porównanie pracy, a przejście na gałąź — wędrówka od jej czubka w górę do głównego łańcucha.
+    Bloki trzymamy w zwartej postaci (model.Block) — na zewnątrz wychodzą jako słowniki.
+    Zmiany tylko pod blokadą pisarza łańcucha.
+    """
+
+    def __init__(self, max_depth=100, max_blocks=1000):
+        self.max_depth = max_depth
+        self.max_blocks = max_blocks
+        # hash -> (Block, wysokość, łączna praca); przy przekroczeniu limitu wypadają najstarsze
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, block_hash):
+        return block_hash in self.entries
+
+    def get(self, block_hash):
+        return self.entries.get(block_hash)
+
+    def block(self, block_hash):
+        entry = self.entries.get(block_hash)
+        return entry[0].to_dict() if entry else None
+
+    def add(self, block, height, work):
+        self.entries[block["hash"]] = (Block.from_dict(block), height, work)
+        while len(self.entries) > self.max_blocks:
+            self.entries.popitem(last=False)
+
+    def remove(self, block_hash):
+        self.entries.pop(block_hash, None)
+
+    def branch(self, block_hash):
+        """Bloki gałęzi kończącej się na `block_hash`, od najstarszego bocznego przodka."""
+        blocks = []
+        entry = self.entries.get(block_hash)
+        while entry is not None:
+            blocks.append(entry[0].to_dict())
+            entry = self.entries.get(entry[0].get("previous_hash"))
+        blocks.reverse()
+        return blocks
+
+    def discard(self, block_hash):
+        """Usuwa blok razem ze wszystkimi potomkami (np. gdy gałąź okazała się nieważna)."""
+        bad = {block_hash}
+        changed = True
+        while changed:
+            changed = False
+            for h, (block, _, _) in self.entries.items():
+                if h not in bad and block.get("previous_hash") in bad:
+                    bad.add(h)
+                    changed = True
+        for h in bad:
+            self.entries.pop(h, None)
+
+    def prune(self, tip_height):
+        """Zapomina gałęzie odchodzące głębiej niż `max_depth` pod czubkiem."""
+        floor = tip_height - self.max_depth
+        for h in [h for h, (_, height, _) in self.entries.items() if height < floor]:
+            del self.entries[h]
+
+    def stats(self):
+        return {"blocks": len(self.entries), "max_depth": self.max_depth, "max_blocks": self.max_blocks}
@@ -0,0 +1,159 @@
+import sqlite3
+import threading
+
+from ledger import transaction_id
+
+# Zmiana schematu wymusza odbudowę indeksu z magazynu bloków
+SCHEMA_VERSION = "2"
+
+
+class ChainIndex:
+    """Trwałe indeksy w SQLite: hash bloku -> wysokość, hash transakcji -> (wysokość, pozycja)
+    oraz historia adresu: node_id -> uporządkowane (wysokość, pozycja).
+
+    Indeks można w każdej chwili odbudować z magazynu bloków, więc przy otwarciu
+    dogania magazyn, a przy niezgodności czubka — przelicza się od ostatniego zgodnego bloku.
+    """
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS blocks (hash TEXT PRIMARY KEY, height INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS blocks_height ON blocks (height);
+            CREATE TABLE IF NOT EXISTS txs (
+                hash TEXT NOT NULL, height INTEGER NOT NULL, position INTEGER NOT NULL,
+                PRIMARY KEY (hash, height, position)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS txs_height ON txs (height);
+            CREATE TABLE IF NOT EXISTS addresses (
+                address TEXT NOT NULL, height INTEGER NOT NULL, position INTEGER NOT NULL,
+                PRIMARY KEY (address, height, position)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS addresses_height ON addresses (height);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.db.commit()
+
+        schema = self.db.execute("SELECT value FROM meta WHERE key = 'schema'").fetchone()
+        if schema is None or schema[0] != SCHEMA_VERSION:
+            self._truncate(0)
+            self._set_tip(0, None)
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema', ?)", (SCHEMA_VERSION,))
+            self.db.commit()
+
+    def _tip(self):
+        rows = dict(self.db.execute("SELECT key, value FROM meta"))
+        return int(rows.get("height", 0)), rows.get("tip")
+
+    def _set_tip(self, height, tip):
+        self.db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [("height", str(height)), ("tip", tip)])
+
+    def _insert(self, height, block):
+        self.db.execute("INSERT OR REPLACE INTO blocks (hash, height) VALUES (?, ?)", (block["hash"], height))
+        self.db.executemany(
+            "INSERT OR REPLACE INTO txs (hash, height, position) VALUES (?, ?, ?)",
+            [(transaction_id(tx), height, position) for position, tx in enumerate(block["transactions"])]
+        )
+        self.db.executemany(
+            "INSERT OR REPLACE INTO addresses (address, height, position) VALUES (?, ?, ?)",
+            [
+                (address, height, position)
+                for position, tx in enumerate(block["transactions"])
+                for address in {tx.get("sender"), tx.get("receiver")} - {"*", None}
+            ]
+        )
+
+    def _truncate(self, height):
+        self.db.execute("DELETE FROM blocks WHERE height >= ?", (height,))
+        self.db.execute("DELETE FROM txs WHERE height >= ?", (height,))
+        self.db.execute("DELETE FROM addresses WHERE height >= ?", (height,))
+
+    def catch_up(self, store):
+        """Dopisuje do indeksu bloki z magazynu, których jeszcze nie ma."""
+        with self.lock:
+            height, tip = self._tip()
+            if height > len(store) or (height and store.hash_at(height - 1) != tip):
+                # Magazyn stracił końcówkę albo awaria przerwała reorganizację — cofamy się tylko do zgodnego bloku
+                height = self._matching_height(store, height)
+            # Przyciętych bloków nie ma już w magazynie — indeksujemy od pierwszego zachowanego.
+            # Ich transakcji nie usuwamy: tylko po nich węzeł rozpozna powtórzone transakcje
+            height = max(height, store.prune_height)
+            self._truncate(height)
+
+            for n, block in enumerate(store.iter_blocks(height), start=height):
+                self._insert(n, block)
+                height, tip = n + 1, block["hash"]
+            self._set_tip(height, tip)
+            self.db.commit()
+
+    def _matching_height(self, store, height):
+        """Najwyższa wysokość nie większa niż `height`, do której bloki indeksu zgadzają się z magazynem."""
+        height = min(height, len(store))
+        while height > store.prune_height:
+            row = self.db.execute("SELECT hash FROM blocks WHERE height = ?", (height - 1,)).fetchone()
+            if row is not None and row[0] == store.hash_at(height - 1):
+                break
+            height -= 1
+        return height
+
+    def add_block(self, height, block):
+        with self.lock:
+            self._insert(height, block)
+            self._set_tip(height + 1, block["hash"])
+            self.db.commit()
+
+    def replace_tail(self, fork_height, blocks):
+        """Cofa indeks do wysokości `fork_height` i dopisuje bloki nowej gałęzi w jednej transakcji."""
+        with self.lock:
+            self._truncate(fork_height)
+            tip = None
+            if not blocks and fork_height:
+                tip = self.db.execute("SELECT hash FROM blocks WHERE height = ?", (fork_height - 1,)).fetchone()[0]
+            for n, block in enumerate(blocks, start=fork_height):
+                self._insert(n, block)
+                tip = block["hash"]
+            self._set_tip(fork_height + len(blocks), tip)
+            self.db.commit()
+
+    def prune(self, height):
+        """Zapomina bloki i historię adresów poniżej `height`. Transakcje zostają — po nich
+        węzeł przycięty rozpoznaje powtórzone transakcje z usuniętych bloków."""
+        with self.lock:
+            self.db.execute("DELETE FROM blocks WHERE height < ?", (height,))
+            self.db.execute("DELETE FROM addresses WHERE height < ?", (height,))
+            self.db.commit()
+
+    def block_height(self, block_hash):
+        with self.lock:
+            row = self.db.execute("SELECT height FROM blocks WHERE hash = ?", (block_hash,)).fetchone()
+        return row[0] if row else None
+
+    def transaction_location(self, tx_hash):
+        """Zwraca (wysokość, pozycja) najnowszego wystąpienia transakcji albo None."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT height, position FROM txs WHERE hash = ? ORDER BY height DESC LIMIT 1", (tx_hash,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def history(self, address, before=None, limit=50):
+        """Strona historii adresu od najnowszych: lista (wysokość, pozycja) starszych niż `before`."""
+        with self.lock:
+            if before is None:
+                rows = self.db.execute(
+                    "SELECT height, position FROM addresses WHERE address = ? "
+                    "ORDER BY height DESC, position DESC LIMIT ?", (address, limit)
+                )
+            else:
+                rows = self.db.execute(
+                    "SELECT height, position FROM addresses WHERE address = ? AND (height, position) < (?, ?) "
+                    "ORDER BY height DESC, position DESC LIMIT ?", (address, before[0], before[1], limit)
+                )
+            return [tuple(row) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,170 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from difficulty import block_work, meets_target
+from header import block_hash, block_version, LEGACY_VERSION
+
+HEADERS_PER_REQUEST = 2000
+BLOCKS_PER_REQUEST = 100
+
+
+def block_header(block):
+    """Nagłówek bloku: wszystko poza listą transakcji."""
+    header = {k: v for k, v in block.items() if k != "transactions"}
+    header["tx_count"] = len(block["transactions"])
+    return header
+
+
+class ChainSync:
+    """Synchronizacja "najpierw nagłówki": szukamy wspólnego przodka i pobieramy tylko brakujące bloki."""
+
+    def __init__(self, blockchain, timeout=5, workers=8):
+        self.blockchain = blockchain
+        self.timeout = timeout
+        self.workers = workers
+
+    def get(self, peer, path, **params):
+        # Korzystamy z puli połączeń keep-alive Broadcastera
+        response = self.blockchain.broadcaster.session.get(f"http://{peer}{path}", params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def peers(self):
+        return [info["ip"] for info in self.blockchain.nodes.values() if info["ip"] != self.blockchain.node_address]
+
+    def probe(self, peer):
+        try:
+            info = self.get(peer, "/headers", **{"from": 0, "to": 0})
+            return peer, info["length"], info["tip"]
+        except Exception:
+            return peer, 0, None
+
+    def fetch_headers(self, peer, start, stop):
+        headers = []
+        while start < stop:
+            batch = self.get(peer, "/headers", **{"from": start, "to": min(stop, start + HEADERS_PER_REQUEST)})["headers"]
+            if not batch:
+                break
+            headers.extend(batch)
+            start += len(batch)
+        return headers
+
+    def find_common_ancestor(self, peer, peer_length):
+        """Zwraca liczbę wspólnych bloków (wysokość rozwidlenia) naszego łańcucha i łańcucha peera."""
+        store = self.blockchain.store
+        top = min(len(store), peer_length)
+        window = 16
+
+        # Okno cofa się od czubka wykładniczo, aż trafimy na wspólny blok
+        while True:
+            start = max(0, top - window)
+            headers = self.fetch_headers(peer, start, top)
+            for height in range(start + len(headers) - 1, start - 1, -1):
+                if store.hash_at(height) == headers[height - start]["hash"]:
+                    return height + 1
+            if start == 0:
+                return 0
+            window *= 4
+
+    def branch_work(self, headers, fork):
+        """Łączna praca łańcucha peera (nasze bloki do `fork` + jego nagłówki) albo None, gdy nagłówki są błędne."""
+        # Nagłówek v2 sam wystarcza do sprawdzenia hasha — dawne bloki sprawdzamy dopiero po pobraniu
+        blockchain = self.blockchain
+        previous_hash = blockchain.store.hash_at(fork - 1) if fork else None
+        work = blockchain.chain_work(fork)
+
+        if not blockchain.timestamps_valid(fork, headers):
+            return None
+
+        # Cel każdej wysokości wynika ze znaczników czasu nagłówków tej gałęzi
+        for header, target in zip(headers, blockchain.branch_targets(fork, headers)):
+            if previous_hash is not None and header["previous_hash"] != previous_hash:
+                return None
+            if not meets_target(header["hash"], target):
+                return None
+            if block_version(header) != LEGACY_VERSION and block_hash(header) != header["hash"]:
+                return None
+            previous_hash = header["hash"]
+            work += block_work(target)
+        return work
+
+    def download_blocks(self, peers, fork, stop):
+        ranges = [(start, min(stop, start + BLOCKS_PER_REQUEST)) for start in range(fork, stop, BLOCKS_PER_REQUEST)]
+
+        def fetch(job):
+            n, (start, end) = job
+            # Zakresy rozdzielamy po kolei między peerów; przy błędzie próbujemy u pozostałych
+            for attempt in range(len(peers)):
+                peer = peers[(n + attempt) % len(peers)]
+                try:
+                    blocks = self.get(peer, "/blocks", **{"from": start, "to": end})["blocks"]
+                    if len(blocks) == end - start:
+                        return blocks
+                except Exception:
+                    continue
+            raise ValueError(f"Nie udało się pobrać bloków {start}-{end}")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            parts = list(executor.map(fetch, enumerate(ranges)))
+        return [block for part in parts for block in part]
+
+    def sync(self):
+        blockchain = self.blockchain
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            probes = list(executor.map(self.probe, self.peers()))
+
+        # Pomijamy peerów, których czubek już znamy; o wyborze gałęzi decyduje łączna praca, nie długość.
+        # Najpierw najdłuższe łańcuchy — jeśli któryś okaże się błędny, próbujemy kolejnego
+        candidates = sorted((p for p in probes if p[2] and not blockchain.is_known_block(p[2])), key=lambda p: p[1], reverse=True)
+        tried_tips = set()
+
+        for peer, length, tip in candidates:
+            if tip in tried_tips:
+                continue
+            tried_tips.add(tip)
+
+            try:
+                fork = self.find_common_ancestor(peer, length)
+                # Węzeł przycięty nie cofnie się poniżej zachowanych bloków
+                if not blockchain.can_reorganize(fork):
+                    continue
+                headers = self.fetch_headers(peer, fork, length)
+                if len(headers) != length - fork:
+                    continue
+
+                work = self.branch_work(headers, fork)
+                if work is None or work <= blockchain.chain_work(len(blockchain.chain)):
+                    continue
+
+                # Bloki pobieramy równolegle od wszystkich peerów z tym samym czubkiem
+                sources = [peer] + [p for p, l, t in probes if t == tip and p != peer]
+                blocks = self.download_blocks(sources, fork, length)
+            except Exception as e:
+                print(f"❌ Synchronizacja z {peer} nieudana: {e}")
+                continue
+
+            # Treść bloków musi dawać hashe z nagłówków
+            if any(
+                block["hash"] != header["hash"] or block["hash"] != blockchain.hash({k: v for k, v in block.items() if k != "hash"})
+                for block, header in zip(blocks, headers)
+            ):
+                continue
+
+            # Walidujemy tylko brakujący fragment, doklejony do wspólnego przodka (bez blokady pisarza)
+            previous_block = blockchain.chain[fork - 1] if fork else None
+            if not blockchain.is_chain_valid(blocks, previous_block, fork):
+                continue
+
+            with blockchain.lock:
+                # W trakcie pobierania mogły dojść bloki albo inna synchronizacja mogła podmienić przodka
+                current = blockchain.chain[fork - 1]["hash"] if fork else None
+                if not blockchain.can_reorganize(fork) or blockchain.chain_work(len(blockchain.chain)) >= work or current != (previous_block["hash"] if previous_block else None):
+                    continue
+                # Salda sprawdzamy tak jak przy reorganizacji z drzewa — pierwszy brak środków odrzuca gałąź
+                if not blockchain.replace_suffix(fork, blocks, check_balances=True):
+                    print(f"❌ Gałąź od {peer} zawiera transakcje bez pokrycia")
+                    continue
+            print(f"🔄 Zsynchronizowano z {peer}: {len(blocks)} bloków od wysokości {fork}")
+            return True
+
+        return False
@@ -0,0 +1,323 @@
+import json
+import struct
+
+# Binarny format wymiany bloków i transakcji. Każda wiadomość zaczyna się od bajtu wersji formatu.
+# Hashe (64 znaki hex) i podpisy przesyłamy jako surowe bajty; JSON pozostaje formatem domyślnym.
+CODEC_VERSION = 1
+MEDIA_TYPE = "application/x-blockchain"
+# Formaty odpowiedzi /chain (pierwszy jest domyślny)
+CHAIN_MIMETYPES = ["application/json", MEDIA_TYPE]
+
+TX_FIELDS = ("sender", "receiver", "amount", "timestamp", "signature")
+BLOCK_FIELDS = ("version", "index", "timestamp", "previous_hash", "merkle_root", "proof", "hash")
+
+# Rodzaje rekordów: struktura pól, JSON dla obiektów spoza schematu
+# albo stały układ dla typowej transakcji / nagłówka v2 (jedno struct.pack zamiast pola po polu)
+_STRUCTURED = 0
+_JSON = 1
+_FIXED = 2
+
+# Typy wartości
+_INT = 1
+_FLOAT = 2
+_HASH = 3
+_HEX = 4
+_STR = 5
+
+_DOUBLE = struct.Struct(">d")
+# sender, receiver, amount, timestamp, długość podpisu
+_FIXED_TX = struct.Struct(">32s32sddH")
+# version, index, timestamp, previous_hash, merkle_root, proof, hash
+_FIXED_BLOCK = struct.Struct(">IQd32s32sQ32s")
+_TX_KEYS = frozenset(TX_FIELDS)
+_BLOCK_KEYS = frozenset(BLOCK_FIELDS + ("transactions",))
+_HEX_DIGITS = set("0123456789abcdef")
+
+
+class CodecError(ValueError):
+    pass
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _write_varint(out, n):
+    while True:
+        byte = n & 0x7f
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data, pos):
+    n = shift = 0
+    while True:
+        if pos >= len(data):
+            raise CodecError("Ucięta liczba")
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return n, pos
+        shift += 7
+
+
+def _is_hex(value):
+    # Tylko małe litery — inaczej dekodowanie nie odtworzyłoby tego samego napisu
+    return len(value) % 2 == 0 and _HEX_DIGITS.issuperset(value)
+
+
+def _write_value(out, value):
+    if isinstance(value, bool) or value is None:
+        raise _Unsupported()
+    if isinstance(value, int):
+        out.append(_INT)
+        _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += _DOUBLE.pack(value)
+    elif isinstance(value, str) and len(value) == 64 and _is_hex(value):
+        out.append(_HASH)
+        out += bytes.fromhex(value)
+    elif isinstance(value, str) and value and _is_hex(value):
+        out.append(_HEX)
+        _write_varint(out, len(value) // 2)
+        out += bytes.fromhex(value)
+    elif isinstance(value, str):
+        raw = value.encode()
+        out.append(_STR)
+        _write_varint(out, len(raw))
+        out += raw
+    else:
+        raise _Unsupported()
+
+
+def _read_bytes(data, pos, size):
+    if pos + size > len(data):
+        raise CodecError("Ucięte dane")
+    return data[pos:pos + size], pos + size
+
+
+def _read_value(data, pos):
+    tag, pos = data[pos], pos + 1
+    if tag == _INT:
+        n, pos = _read_varint(data, pos)
+        return (n >> 1 if not n & 1 else -((n + 1) >> 1)), pos
+    if tag == _FLOAT:
+        raw, pos = _read_bytes(data, pos, _DOUBLE.size)
+        return _DOUBLE.unpack(raw)[0], pos
+    if tag == _HASH:
+        raw, pos = _read_bytes(data, pos, 32)
+        return raw.hex(), pos
+    if tag in (_HEX, _STR):
+        size, pos = _read_varint(data, pos)
+        raw, pos = _read_bytes(data, pos, size)
+        return (raw.hex() if tag == _HEX else raw.decode()), pos
+    raise CodecError(f"Nieznany typ wartości {tag}")
+
+
+def _write_record(out, obj, fields, write_body=None):
+    """Rekord: bitmapa obecnych pól + ich wartości. Obiekty spoza schematu zapisujemy jako JSON."""
+    extra = set(obj) - set(fields) - ({"transactions"} if write_body else set())
+    if not extra:
+        record = bytearray([_STRUCTURED])
+        present = 0
+        try:
+            for bit, field in enumerate(fields):
+                if field in obj:
+                    present |= 1 << bit
+                    _write_value(record, obj[field])
+            if write_body:
+                write_body(record)
+        except _Unsupported:
+            pass
+        else:
+            record[1:1] = bytes([present])
+            out += record
+            return
+
+    _write_json(out, obj)
+
+
+def _raw_hex(value, size=None):
+    # Zwraca bajty tylko dla napisu hex, który po zdekodowaniu da się odtworzyć co do znaku
+    try:
+        raw = bytes.fromhex(value)
+    except (TypeError, ValueError):
+        return None
+    if (size is not None and len(raw) != size) or raw.hex() != value:
+        return None
+    return raw
+
+
+def _write_fixed_tx(out, tx):
+    if tx.keys() != _TX_KEYS or type(tx["amount"]) is not float or type(tx["timestamp"]) is not float:
+        return False
+    sender = _raw_hex(tx["sender"], 32)
+    receiver = _raw_hex(tx["receiver"], 32)
+    signature = _raw_hex(tx["signature"])
+    if sender is None or receiver is None or signature is None or len(signature) > 0xffff:
+        return False
+    out.append(_FIXED)
+    out += _FIXED_TX.pack(sender, receiver, tx["amount"], tx["timestamp"], len(signature))
+    out += signature
+    return True
+
+
+def _read_fixed_tx(data, pos):
+    if pos + _FIXED_TX.size > len(data):
+        raise CodecError("Ucięta transakcja")
+    sender, receiver, amount, timestamp, size = _FIXED_TX.unpack_from(data, pos)
+    pos += _FIXED_TX.size
+    signature, pos = _read_bytes(data, pos, size)
+    return {
+        "sender": sender.hex(),
+        "receiver": receiver.hex(),
+        "amount": amount,
+        "timestamp": timestamp,
+        "signature": signature.hex()
+    }, pos
+
+
+def _write_fixed_block(out, block):
+    if block.keys() != _BLOCK_KEYS or type(block["timestamp"]) is not float:
+        return False
+    if any(type(block[k]) is not int for k in ("version", "index", "proof")):
+        return False
+    hashes = [_raw_hex(block[k], 32) for k in ("previous_hash", "merkle_root", "hash")]
+    if None in hashes or not (0 <= block["version"] < 2 ** 32 and 0 <= block["index"] < 2 ** 64 and 0 <= block["proof"] < 2 ** 64):
+        return False
+    out.append(_FIXED)
+    out += _FIXED_BLOCK.pack(block["version"], block["index"], block["timestamp"], hashes[0], hashes[1], block["proof"], hashes[2])
+    _write_transactions(out, block["transactions"])
+    return True
+
+
+def _read_fixed_block(data, pos):
+    if pos + _FIXED_BLOCK.size > len(data):
+        raise CodecError("Ucięty nagłówek")
+    version, index, timestamp, previous_hash, merkle_root, proof, block_hash = _FIXED_BLOCK.unpack_from(data, pos)
+    block = {
+        "version": version,
+        "index": index,
+        "timestamp": timestamp,
+        "previous_hash": previous_hash.hex(),
+        "merkle_root": merkle_root.hex(),
+        "proof": proof,
+        "hash": block_hash.hex()
+    }
+    return block, _read_transactions(block, data, pos + _FIXED_BLOCK.size)
+
+
+def _write_json(out, obj):
+    raw = json.dumps(obj).encode()
+    out.append(_JSON)
+    _write_varint(out, len(raw))
+    out += raw
+
+
+def _read_record(data, pos, fields, read_body=None):
+    if pos >= len(data):
+        raise CodecError("Ucięty rekord")
+    kind, pos = data[pos], pos + 1
+    if kind == _FIXED:
+        return (_read_fixed_block if read_body else _read_fixed_tx)(data, pos)
+    if kind == _JSON:
+        size, pos = _read_varint(data, pos)
+        raw, pos = _read_bytes(data, pos, size)
+        return json.loads(raw), pos
+    if kind != _STRUCTURED:
+        raise CodecError(f"Nieznany rodzaj rekordu {kind}")
+
+    present, pos = data[pos], pos + 1
+    obj = {}
+    for bit, field in enumerate(fields):
+        if present & (1 << bit):
+            obj[field], pos = _read_value(data, pos)
+    if read_body:
+        pos = read_body(obj, data, pos)
+    return obj, pos
+
+
+def _write_transactions(out, transactions):
+    _write_varint(out, len(transactions))
+    for tx in transactions:
+        if not _write_fixed_tx(out, tx):
+            _write_record(out, tx, TX_FIELDS)
+
+
+def _read_transactions(block, data, pos):
+    count, pos = _read_varint(data, pos)
+    transactions = []
+    for _ in range(count):
+        if pos < len(data) and data[pos] == _FIXED:
+            tx, pos = _read_fixed_tx(data, pos + 1)
+        else:
+            tx, pos = _read_record(data, pos, TX_FIELDS)
+        transactions.append(tx)
+    block["transactions"] = transactions
+    return pos
+
+
+def _check_version(data):
+    if not data or data[0] != CODEC_VERSION:
+        raise CodecError("Nieobsługiwana wersja formatu")
+    return 1
+
+
+def _decode(read, data):
+    try:
+        obj, pos = read(data, _check_version(data))
+    except (IndexError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise CodecError(f"Uszkodzone dane: {e}")
+    if pos != len(data):
+        raise CodecError("Nadmiarowe dane")
+    return obj
+
+
+def encode_transaction(tx):
+    out = bytearray([CODEC_VERSION])
+    if not _write_fixed_tx(out, tx):
+        _write_record(out, tx, TX_FIELDS)
+    return bytes(out)
+
+
+def decode_transaction(data):
+    return _decode(lambda data, pos: _read_record(data, pos, TX_FIELDS), data)
+
+
+def _write_block(out, block):
+    if not isinstance(block.get("transactions"), list):
+        _write_json(out, block)
+        return
+    if _write_fixed_block(out, block):
+        return
+    _write_record(out, block, BLOCK_FIELDS, lambda record: _write_transactions(record, block["transactions"]))
+
+
+def encode_block(block):
+    out = bytearray([CODEC_VERSION])
+    _write_block(out, block)
+    return bytes(out)
+
+
+def decode_block(data):
+    return _decode(lambda data, pos: _read_record(data, pos, BLOCK_FIELDS, _read_transactions), data)
+
+
+def encode_chain_header(length, target, start, pruned):
+    """Początek strumienia /chain; po nim bloki jeden za drugim aż do końca odpowiedzi."""
+    out = bytearray([CODEC_VERSION])
+    for n in (length, target, pruned, start):
+        _write_varint(out, n)
+    return bytes(out)
+
+
+def encode_chain_block(block):
+    out = bytearray()
+    _write_block(out, block)
+    return bytes(out)
@@ -0,0 +1,86 @@
+import hashlib
+
+from ledger import transaction_id
+
+SHORT_ID_BYTES = 6
+
+
+def short_id(block_hash, tx_hash):
+    # Krótki identyfikator zależy od hasha bloku, więc kolizje nie przenoszą się między blokami
+    return hashlib.sha256(f"{block_hash}:{tx_hash}".encode()).hexdigest()[:SHORT_ID_BYTES * 2]
+
+
+def make_compact_block(block):
+    """Nagłówek bloku + krótkie identyfikatory transakcji; nagrody (sender "*") dołączamy w całości."""
+    header = {k: v for k, v in block.items() if k != "transactions"}
+    short_ids = []
+    prefilled = []
+    for index, tx in enumerate(block["transactions"]):
+        if tx.get("sender") == "*":
+            prefilled.append({"index": index, "tx": tx})
+            short_ids.append(None)
+        else:
+            short_ids.append(short_id(block["hash"], transaction_id(tx)))
+    return {"header": header, "short_ids": short_ids, "prefilled": prefilled}
+
+
+def _index_valid(index, count):
+    return type(index) is int and 0 <= index < count
+
+
+def compact_valid(compact):
+    """Czy wiadomość /cmpctblock ma oczekiwany kształt (sprawdzane przed użyciem pól)."""
+    if not isinstance(compact, dict) or not isinstance(compact.get("header"), dict):
+        return False
+    if not isinstance(compact["header"].get("hash"), str) or not isinstance(compact["header"].get("previous_hash"), str):
+        return False
+    short_ids, prefilled = compact.get("short_ids"), compact.get("prefilled")
+    if not isinstance(short_ids, list) or not isinstance(prefilled, list):
+        return False
+    if not all(sid is None or isinstance(sid, str) for sid in short_ids):
+        return False
+    return all(
+        isinstance(item, dict) and _index_valid(item.get("index"), len(short_ids)) and isinstance(item.get("tx"), dict)
+        for item in prefilled
+    )
+
+
+def block_transactions_valid(payload):
+    """Czy wiadomość /blocktxn to hash bloku i lista pozycji {"index", "tx"}."""
+    if not isinstance(payload, dict) or not isinstance(payload.get("hash"), str):
+        return False
+    items = payload.get("transactions", [])
+    return isinstance(items, list) and all(
+        isinstance(item, dict) and type(item.get("index")) is int and isinstance(item.get("tx"), dict) for item in items
+    )
+
+
+def reconstruct(compact, mempool):
+    """Odtwarza listę transakcji z mempoola. Zwraca (transakcje z lukami None, indeksy brakujących)."""
+    block_hash = compact["header"]["hash"]
+    transactions = [None] * len(compact["short_ids"])
+    for item in compact["prefilled"]:
+        transactions[item["index"]] = item["tx"]
+
+    # Identyfikatory z kolizją w mempoolu traktujemy jak brakujące
+    by_short_id = {}
+    for tx in mempool:
+        sid = short_id(block_hash, transaction_id(tx))
+        by_short_id[sid] = None if sid in by_short_id else tx
+
+    missing = []
+    for index, sid in enumerate(compact["short_ids"]):
+        if transactions[index] is not None:
+            continue
+        tx = by_short_id.get(sid)
+        if tx is None:
+            missing.append(index)
+        else:
+            transactions[index] = tx
+    return transactions, missing
+
+
+def assemble(compact, transactions):
+    block = dict(compact["header"])
+    block["transactions"] = transactions
+    return block
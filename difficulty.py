@@ -0,0 +1,106 @@
+# Cel PoW to 256-bitowy próg: blok jest poprawny, gdy hash (jako liczba) nie przekracza celu.
+# Dawne "difficulty = 2" (dwa zera hex) to cel 16^62 - 1 — od niego zaczyna każdy łańcuch.
+MAX_TARGET = 16 ** 63 - 1
+INITIAL_TARGET = 16 ** 62 - 1
+
+# Zmiana celu najwyżej 4x w górę lub w dół na okres — zafałszowane znaczniki czasu niewiele zmienią
+MAX_ADJUSTMENT = 4
+
+
+def target_bytes(target):
+    """Cel jako 32 bajty big-endian — porównywalny wprost z digestem SHA-256."""
+    return target.to_bytes(32, "big")
+
+
+def target_hex(target):
+    return f"{target:064x}"
+
+
+def meets_target(block_hash, target):
+    return int(block_hash, 16) <= target
+
+
+def block_work(target):
+    """Praca bloku = oczekiwana liczba prób hasha przy danym celu."""
+    return 2 ** 256 // (target + 1)
+
+
+def difficulty_of(target):
+    """Trudność względem najłatwiejszego dopuszczalnego celu (1.0 = MAX_TARGET)."""
+    return MAX_TARGET / target
+
+
+def retarget(target, actual, expected):
+    # Arytmetyka na milisekundach w liczbach całkowitych — każdy node dostaje ten sam wynik
+    actual = min(max(round(actual * 1000), round(expected * 1000) // MAX_ADJUSTMENT), round(expected * 1000) * MAX_ADJUSTMENT)
+    return max(1, min(MAX_TARGET, target * actual // round(expected * 1000)))
+
+
+class TargetSchedule:
+    """Cel PoW dla każdej wysokości łańcucha i łączna praca bloków pod nią.
+
+    Cel jest stały w okresie `interval` bloków i przeliczany na początku kolejnego okresu
+    z czasu, w jakim wykopano poprzedni, tak by blok wypadał średnio co `block_interval` sekund.
+    Okresy liczone są leniwie; `timestamp_at(wysokość)` podaje znacznik czasu bloku danej gałęzi.
+    """
+
+    def __init__(self, interval, block_interval, targets=None, work=None, base=0):
+        self.interval = interval
+        self.block_interval = block_interval
+        # Cel i łączna praca na początku każdego okresu, od okresu `base` (wcześniejsze zapomniane)
+        self.targets = targets or [INITIAL_TARGET]
+        self.work = work or [0]
+        self.base = base
+
+    def _extend(self, period, timestamp_at):
+        while self.base + len(self.targets) <= period:
+            start = (self.base + len(self.targets) - 1) * self.interval
+            actual = timestamp_at(start + self.interval - 1) - timestamp_at(start)
+            expected = (self.interval - 1) * self.block_interval
+
+            self.work.append(self.work[-1] + self.interval * block_work(self.targets[-1]))
+            self.targets.append(retarget(self.targets[-1], actual, expected))
+
+    def target_at(self, height, timestamp_at):
+        period = height // self.interval
+        self._extend(period, timestamp_at)
+        return self.targets[period - self.base]
+
+    def chain_work(self, height, timestamp_at):
+        """Łączna praca pierwszych `height` bloków."""
+        period = height // self.interval
+        self._extend(period, timestamp_at)
+        return self.work[period - self.base] + (height - period * self.interval) * block_work(self.targets[period - self.base])
+
+    def truncate(self, height):
+        """Zapomina okresy zależne od bloków od wysokości `height` wzwyż (po reorganizacji)."""
+        keep = height // self.interval + 1 - self.base
+        del self.targets[keep:]
+        del self.work[keep:]
+
+    def forget(self, height):
+        """Zapomina okresy zakończone przed wysokością `height` (węzeł przycięty)."""
+        drop = height // self.interval - self.base
+        if drop > 0:
+            del self.targets[:drop]
+            del self.work[:drop]
+            self.base += drop
+
+    def branch(self, height):
+        """Kopia harmonogramu dla gałęzi odchodzącej na wysokości `height`."""
+        keep = height // self.interval + 1 - self.base
+        return TargetSchedule(self.interval, self.block_interval, self.targets[:keep], self.work[:keep], self.base)
+
+    def to_state(self, height):
+        """Zapamiętane okresy aż do wysokości `height` — do zapisania w snapshocie."""
+        schedule = self.branch(height)
+        return {"interval": schedule.interval, "base": schedule.base, "targets": schedule.targets, "work": schedule.work}
+
+    def load_state(self, state):
+        # Snapshot z innym okresem przeliczania jest bezużyteczny — liczymy harmonogram od nowa
+        if state["interval"] != self.interval:
+            return False
+        self.base = state["base"]
+        self.targets = list(state["targets"])
+        self.work = list(state["work"])
+        return True
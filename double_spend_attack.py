@@ -3,13 +3,15 @@ import hashlib
 import time
 import requests
 
-DIFFICULTY = 2 
+NODE = "http://127.0.0.1:5000"
 
-with open("blockchain.json") as f:
-    chain = json.load(f)
+# Długość i czubek łańcucha bierzemy z noda — blockchain.json to nieaktualna kopia sprzed chaindata
+head = requests.get(f"{NODE}/headers", params={"from": 0, "to": 0}).json()
+length = head["length"]
+previous_hash = head["tip"]
 
-last_block = chain[-1]
-previous_hash = last_block["hash"]
+# Bieżący cel PoW (256-bitowy próg) pobieramy z noda — zmienia się co kilka bloków
+TARGET = int(requests.get(f"{NODE}/chain", params={"from": length}).json()["target"], 16)
 
 # Tworzymy dwie transakcje z tym samym nadawcą
 transactions = [
@@ -31,7 +33,7 @@ transactions = [
 
 # Budujemy nowy blok
 block = {
-    "index": last_block["index"] + 1,
+    "index": length + 1,  # indeksy bloków liczymy od 1
     "timestamp": time.time(),
     "transactions": transactions,
     "nonce": 0,
@@ -42,7 +44,7 @@ print("Szukanie poprawnego hasha...")
 while True:
     block_string = json.dumps(block, sort_keys=True).encode()
     block_hash = hashlib.sha256(block_string).hexdigest()
-    if block_hash.startswith("0" * DIFFICULTY):
+    if int(block_hash, 16) <= TARGET:
         print(f"Hash znaleziony: {block_hash}")
         break
     else:
@@ -51,6 +53,6 @@ while True:
 block["hash"] = block_hash
 
 # Wysyłamy blok do node
-response = requests.post("http://127.0.0.1:5000/new_block", json=block)
+response = requests.post(f"{NODE}/new_block", json=block)
 print("Odpowiedź serwera:")
 print(response.text)
@@ -12,6 +12,8 @@ if response.status_code != 200:
     exit()
 
 chain = response.json()["chain"]
+# Bieżący cel PoW (256-bitowy próg) — zmienia się co kilka bloków
+target = int(response.json()["target"], 16)
 
 # Tworzymy alternatywny łańcuch
 print("Tworzenie alternatywnego łańcucha...")
@@ -29,11 +31,11 @@ for i in range(3):
         "previous_hash": last_block["hash"]
     }
 
-    # Szukanie nonce i hash spełniającego difficulty
+    # Szukanie nonce i hash spełniającego cel
     while True:
         block_string = json.dumps(block, sort_keys=True).encode()
         block_hash = hashlib.sha256(block_string).hexdigest()
-        if block_hash.startswith("0" * 2):
+        if int(block_hash, 16) <= target:
             block["hash"] = block_hash
             break
         else:
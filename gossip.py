@@ -0,0 +1,221 @@
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from codec import MEDIA_TYPE, encode_block, encode_transaction
+from header import is_hash_hex
+
+
+class Broadcaster:
+    """Wysyłka do peerów w tle: kolejka na peera, pula wątków, sesja keep-alive, timeouty i ponowienia."""
+
+    def __init__(self, workers=8, queue_size=1000, timeout=3, retries=2, backoff=0.5,
+                 unhealthy_after=3, unhealthy_cooldown=30, headers=None):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.unhealthy_after = unhealthy_after
+        self.unhealthy_cooldown = unhealthy_cooldown
+        self.queue_size = queue_size
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(headers or {})
+
+        self.lock = threading.Lock()
+        self.queues = {}
+        self.scheduled = set()
+        self.ready = queue.Queue()
+        self.health = {}
+        self.dropped = 0
+
+        for _ in range(workers):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def send(self, peer, method, path, json=None, callback=None, data=None):
+        """Dodaje wiadomość do kolejki peera i od razu wraca. `data` to treść w formacie binarnym (codec.py)."""
+        with self.lock:
+            peer_queue = self.queues.get(peer)
+            if peer_queue is None:
+                peer_queue = self.queues[peer] = deque()
+
+            # Pełna kolejka — wyrzucamy najstarszą wiadomość
+            if len(peer_queue) >= self.queue_size:
+                peer_queue.popleft()
+                self.dropped += 1
+            peer_queue.append((method, path, json, callback, data))
+
+            # Każdy peer jest obsługiwany przez co najwyżej jeden wątek naraz, więc kolejność jest zachowana
+            if peer not in self.scheduled:
+                self.scheduled.add(peer)
+                self.ready.put(peer)
+
+    def broadcast(self, peers, method, path, json=None, callback=None):
+        for peer in peers:
+            self.send(peer, method, path, json, callback)
+
+    def is_healthy(self, peer):
+        state = self.health.get(peer)
+        return state is None or state["unhealthy_until"] <= time.time()
+
+    def _worker(self):
+        while True:
+            peer = self.ready.get()
+            with self.lock:
+                message = self.queues[peer].popleft() if self.queues[peer] else None
+
+            if message is not None:
+                try:
+                    self._deliver(peer, *message)
+                except Exception as e:
+                    print(f"❌ Błąd obsługi odpowiedzi od {peer}: {e}")
+
+            with self.lock:
+                if self.queues[peer]:
+                    self.ready.put(peer)
+                else:
+                    self.scheduled.discard(peer)
+
+    def _deliver(self, peer, method, path, json, callback, data):
+        # Niedostępny peer — nie blokujemy wątków, dopóki nie minie czas kary
+        if not self.is_healthy(peer):
+            with self.lock:
+                self.dropped += 1
+            return
+
+        for attempt in range(self.retries + 1):
+            try:
+                headers = {"Content-Type": MEDIA_TYPE} if data is not None else None
+                response = self.session.request(method, f"http://{peer}{path}", json=json, data=data, headers=headers,
+                                                timeout=self.timeout)
+            except requests.RequestException:
+                if attempt < self.retries:
+                    time.sleep(self.backoff * 2 ** attempt)
+                continue
+
+            self.health.pop(peer, None)
+            if callback is not None:
+                callback(peer, response)
+            return
+
+        state = self.health.setdefault(peer, {"failures": 0, "unhealthy_until": 0})
+        state["failures"] += 1
+        if state["failures"] >= self.unhealthy_after:
+            state["unhealthy_until"] = time.time() + self.unhealthy_cooldown
+            print(f"⚠️ Peer {peer} oznaczony jako niedostępny na {self.unhealthy_cooldown}s")
+
+    def stats(self):
+        with self.lock:
+            return {
+                "dropped": self.dropped,
+                "peers": {
+                    peer: {
+                        "queued": len(peer_queue),
+                        "healthy": self.is_healthy(peer),
+                        "failures": self.health.get(peer, {}).get("failures", 0)
+                    }
+                    for peer, peer_queue in self.queues.items()
+                }
+            }
+
+
+class InventoryRelay:
+    """Gossip oparty na inwentarzu: ogłaszamy hashe, a peer pobiera tylko to, czego nie ma."""
+
+    # Gdzie wysłać pełny obiekt danego typu, gdy peer o niego poprosi
+    PATHS = {"tx": "/transaction", "block": "/new_block"}
+    # Pełne obiekty wysyłamy w formacie binarnym — hashe i podpisy jako bajty zamiast hex
+    ENCODERS = {"tx": encode_transaction, "block": encode_block}
+
+    def __init__(self, broadcaster, has_item, get_item, flush_interval=0.1, max_batch=500,
+                 known_size=50000, request_timeout=10):
+        self.broadcaster = broadcaster
+        self.has_item = has_item
+        self.get_item = get_item
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.known_size = known_size
+        self.request_timeout = request_timeout
+
+        self.lock = threading.Lock()
+        # Co wiemy, że dany peer już ma (bo nam to ogłosił albo od nas dostał)
+        self.peer_known = {}
+        # Ogłoszenia czekające na wysłanie w najbliższej paczce
+        self.pending = {}
+        # Obiekty, o które już poprosiliśmy (hash -> termin), żeby nie pobierać ich od kilku peerów naraz
+        self.requested = {}
+
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+
+    def mark_known(self, peer, item_hash):
+        if not peer:
+            return
+        with self.lock:
+            known = self.peer_known.setdefault(peer, OrderedDict())
+            known[item_hash] = True
+            known.move_to_end(item_hash)
+            while len(known) > self.known_size:
+                known.popitem(last=False)
+
+    def knows(self, peer, item_hash):
+        return item_hash in self.peer_known.get(peer, ())
+
+    def announce(self, peers, kind, item_hash, exclude=None):
+        with self.lock:
+            for peer in peers:
+                if peer == exclude or self.knows(peer, item_hash):
+                    continue
+                self.pending.setdefault(peer, []).append({"type": kind, "hash": item_hash})
+
+    @classmethod
+    def inventory_valid(cls, items):
+        """Czy wiadomość /inv to lista pozycji {"type": znany typ, "hash": 64 znaki hex}."""
+        return isinstance(items, list) and all(
+            isinstance(item, dict) and item.get("type") in cls.PATHS and is_hash_hex(item.get("hash"))
+            for item in items
+        )
+
+    def handle_inv(self, peer, items):
+        """Obsługa /inv od peera — zwraca listę obiektów, których nam brakuje."""
+        now = time.time()
+        want = []
+        for item in items:
+            self.mark_known(peer, item["hash"])
+            if self.has_item(item["type"], item["hash"]):
+                continue
+            with self.lock:
+                if self.requested.get(item["hash"], 0) > now:
+                    continue
+                self.requested[item["hash"]] = now + self.request_timeout
+            want.append(item)
+
+        with self.lock:
+            if len(self.requested) > self.known_size:
+                self.requested = {h: t for h, t in self.requested.items() if t > now}
+        return want
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            with self.lock:
+                pending, self.pending = self.pending, {}
+
+            for peer, items in pending.items():
+                for i in range(0, len(items), self.max_batch):
+                    batch = items[i:i + self.max_batch]
+                    for item in batch:
+                        self.mark_known(peer, item["hash"])
+                    self.broadcaster.send(peer, "POST", "/inv", {"items": batch}, self._on_inv_response)
+
+    def _on_inv_response(self, peer, response):
+        if response.status_code != 200:
+            return
+        for item in response.json().get("want", []):
+            payload = self.get_item(item["type"], item["hash"])
+            if payload is not None:
+                self.broadcaster.send(peer, "POST", self.PATHS[item["type"]], data=self.ENCODERS[item["type"]](payload))
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import struct
+
+from merkle import merkle_root, tx_leaf
+
+# Bloki bez pola "version" (np. z dawnego blockchain.json) to wersja 1 — hash z JSON-a całego bloku
+LEGACY_VERSION = 1
+HEADER_VERSION = 2
+
+# Nagłówek v2: version, index, timestamp, previous_hash, merkle_root, nonce.
+# Nonce jest na końcu, więc przy kopaniu zmienia się tylko ostatnie 8 bajtów.
+HEADER_FORMAT = struct.Struct(">IQd32s32sQ")
+NONCE_FORMAT = struct.Struct(">Q")
+# Jedyne pola bloku v2: hash wiąże tylko nagłówek, a transakcje — przez korzeń Merkle
+BLOCK_KEYS = frozenset(("version", "index", "timestamp", "previous_hash", "merkle_root", "proof", "hash", "transactions"))
+HEX_DIGITS = frozenset("0123456789abcdef")
+
+
+def is_hash_hex(value):
+    """Czy wartość to hash SHA-256 zapisany jak hexdigest: dokładnie 64 małe znaki hex."""
+    return isinstance(value, str) and len(value) == 64 and HEX_DIGITS.issuperset(value)
+
+
+def block_version(block):
+    return block.get("version", LEGACY_VERSION)
+
+
+def fields_valid(block):
+    """Czy blok v2 nie niesie pól spoza nagłówka i transakcji — nie obejmuje ich hash, więc ktoś mógłby je dopisać."""
+    return block_version(block) == LEGACY_VERSION or BLOCK_KEYS.issuperset(block)
+
+
+def encode_header(block):
+    # bytes.fromhex dopełniłby krótszy hash zerami — ten sam nagłówek miałby wtedy różne zapisy
+    if not is_hash_hex(block["previous_hash"]) or not is_hash_hex(block["merkle_root"]):
+        raise ValueError("Hash w nagłówku musi mieć 64 znaki hex")
+    return HEADER_FORMAT.pack(
+        block["version"],
+        block["index"],
+        block["timestamp"],
+        bytes.fromhex(block["previous_hash"]),
+        bytes.fromhex(block["merkle_root"]),
+        block["proof"]
+    )
+
+
+def block_hash(block):
+    """Hash bloku zgodny z jego wersją. Zwraca None dla nieznanej wersji lub uszkodzonego nagłówka."""
+    version = block_version(block)
+    if version == LEGACY_VERSION:
+        legacy = {k: v for k, v in block.items() if k != "hash"}
+        return hashlib.sha256(json.dumps(legacy, sort_keys=True).encode()).hexdigest()
+    if version != HEADER_VERSION:
+        return None
+
+    try:
+        return hashlib.sha256(encode_header(block)).hexdigest()
+    except (KeyError, TypeError, ValueError, struct.error):
+        return None
+
+
+def transactions_root(transactions):
+    return merkle_root([tx_leaf(tx) for tx in transactions])
+
+
+def merkle_valid(block):
+    """Czy korzeń Merkle z nagłówka zgadza się z transakcjami (bloki v1 go nie mają)."""
+    if block_version(block) == LEGACY_VERSION:
+        return True
+    return block.get("merkle_root") == transactions_root(block["transactions"])
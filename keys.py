@@ -0,0 +1,26 @@
+from cryptography.hazmat.primitives import serialization
+
+
+class KeyRegistry:
+    """Sparsowane klucze publiczne nodów (node_id -> obiekt klucza), by nie parsować PEM przy każdym podpisie."""
+
+    def __init__(self):
+        self.keys = {}
+
+    def add(self, node_id, public_key_pem, public_key=None):
+        # Nowy wpis zastępuje stary — zmiana klucza noda unieważnia poprzedni obiekt
+        self.keys.pop(node_id, None)
+        if public_key is None:
+            try:
+                public_key = serialization.load_pem_public_key(public_key_pem.encode('utf-8'))
+            except ValueError:
+                return
+        self.keys[node_id] = (public_key_pem, public_key)
+
+    def get(self, node_id, public_key_pem):
+        entry = self.keys.get(node_id)
+        if entry is None or entry[0] != public_key_pem:
+            public_key = serialization.load_pem_public_key(public_key_pem.encode('utf-8'))
+            self.keys[node_id] = (public_key_pem, public_key)
+            return public_key
+        return entry[1]
@@ -0,0 +1,161 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+
+def transaction_id(tx):
+    # Hash transakcji liczony jak w add_transaction — bez podpisu
+    tx_copy = {k: v for k, v in tx.items() if k != "signature"}
+    return hashlib.sha256(json.dumps(tx_copy, sort_keys=True).encode()).hexdigest()
+
+
+def transaction_fields_valid(tx):
+    """Czy pola transakcji mają oczekiwane typy (sprawdzane przed liczeniem sald i podpisów)."""
+    def is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return (
+        isinstance(tx, dict)
+        and all(isinstance(tx.get(field), str) for field in ("sender", "receiver", "signature"))
+        and is_number(tx.get("amount")) and is_number(tx.get("timestamp"))
+    )
+
+
+class FrozenOverlay:
+    """Niezmienny słownik do publikowania czytelnikom: warstwy zmian nałożone na bazę.
+
+    `update` zwraca nowy widok z nową warstwą, nie ruszając dotychczasowego. Warstwy scalamy,
+    gdy niższa jest najwyżej dwa razy większa od nowej — jest ich O(log n), a publikacja
+    kosztuje średnio tyle, ile zmienionych wpisów. None oznacza wpis usunięty.
+    """
+
+    __slots__ = ("layers",)
+
+    def __init__(self, layers=()):
+        self.layers = tuple(layers)
+
+    def get(self, key, default=None):
+        for layer in reversed(self.layers):
+            if key in layer:
+                value = layer[key]
+                return default if value is None else value
+        return default
+
+    def update(self, changes):
+        layers = list(self.layers)
+        top = dict(changes)
+        while layers and len(layers[-1]) <= 2 * len(top):
+            top = {**layers.pop(), **top}
+        if not layers:
+            top = {key: value for key, value in top.items() if value is not None}
+        layers.append(top)
+        return FrozenOverlay(layers)
+
+
+class BalanceLedger:
+    """Salda kont (node_id -> balans) utrzymywane przyrostowo przy dopisywaniu bloków."""
+
+    def __init__(self, undo_depth=100):
+        self.balances = {}
+        # Hashe zatwierdzonych transakcji (hash -> liczba wystąpień w łańcuchu)
+        self.tx_hashes = {}
+        # Dane do cofania ostatnich bloków: hash bloku -> poprzednie salda zmienionych kont
+        self.undo = OrderedDict()
+        self.undo_depth = undo_depth
+        # Konta zmienione od ostatniej publikacji sald (None = wszystkie, np. po wczytaniu stanu)
+        self.touched = None
+        self.published = FrozenOverlay()
+
+    def get(self, node_id):
+        return self.balances.get(node_id, 0)
+
+    def snapshot(self):
+        """Niezmienny widok sald dla czytelników — kopiuje tylko konta zmienione od poprzedniego."""
+        touched, self.touched = self.touched, set()
+        if touched is None:
+            self.published = FrozenOverlay([dict(self.balances)])
+        elif touched:
+            self.published = self.published.update({account: self.balances.get(account) for account in touched})
+        return self.published
+
+    def is_confirmed(self, tx_hash):
+        return tx_hash in self.tx_hashes
+
+    def apply_block(self, block):
+        previous = {}
+        for tx in block["transactions"]:
+            # Ta sama kolejność co w dawnym get_balance: odbiorca ma pierwszeństwo
+            touched = [tx["receiver"]] if tx["sender"] == tx["receiver"] else [tx["receiver"], tx["sender"]]
+            for account in touched:
+                if account not in previous:
+                    previous[account] = self.balances.get(account)
+
+            self.balances[tx["receiver"]] = self.balances.get(tx["receiver"], 0) + tx["amount"]
+            if tx["sender"] != tx["receiver"]:
+                self.balances[tx["sender"]] = self.balances.get(tx["sender"], 0) - tx["amount"]
+
+            tx_hash = transaction_id(tx)
+            self.tx_hashes[tx_hash] = self.tx_hashes.get(tx_hash, 0) + 1
+
+        self.undo[block["hash"]] = previous
+        if self.touched is not None:
+            self.touched.update(previous)
+        while len(self.undo) > self.undo_depth:
+            self.undo.popitem(last=False)
+
+    def revert_block(self, block):
+        """Cofa blok z czubka łańcucha. Zwraca False, gdy brak danych do cofnięcia."""
+        previous = self.undo.pop(block["hash"], None)
+        if previous is None:
+            return False
+
+        for account, balance in previous.items():
+            if balance is None:
+                self.balances.pop(account, None)
+            else:
+                self.balances[account] = balance
+        if self.touched is not None:
+            self.touched.update(previous)
+
+        for tx in block["transactions"]:
+            tx_hash = transaction_id(tx)
+            if self.tx_hashes.get(tx_hash, 0) > 1:
+                self.tx_hashes[tx_hash] -= 1
+            else:
+                self.tx_hashes.pop(tx_hash, None)
+        return True
+
+    def forget(self, blocks):
+        """Zapomina hashe transakcji z przyciętych bloków — salda zostają bez zmian."""
+        for block in blocks:
+            self.undo.pop(block["hash"], None)
+            for tx in block["transactions"]:
+                tx_hash = transaction_id(tx)
+                if self.tx_hashes.get(tx_hash, 0) > 1:
+                    self.tx_hashes[tx_hash] -= 1
+                else:
+                    self.tx_hashes.pop(tx_hash, None)
+
+    def recount(self, blocks):
+        """Liczy hashe transakcji od nowa z podanych bloków (salda i dane do cofania bez zmian)."""
+        self.tx_hashes = {}
+        for block in blocks:
+            for tx in block["transactions"]:
+                tx_hash = transaction_id(tx)
+                self.tx_hashes[tx_hash] = self.tx_hashes.get(tx_hash, 0) + 1
+
+    def rebuild(self, chain):
+        self.balances = {}
+        self.tx_hashes = {}
+        self.undo = OrderedDict()
+        self.touched = None
+        for block in chain:
+            self.apply_block(block)
+
+    def to_state(self):
+        return {"balances": self.balances, "tx_hashes": self.tx_hashes}
+
+    def load_state(self, state):
+        self.balances = dict(state["balances"])
+        self.tx_hashes = dict(state["tx_hashes"])
+        self.undo = OrderedDict()
+        self.touched = None
@@ -1,20 +1,39 @@
 import hashlib
 import time
 import json
-from flask import Flask, request
+from flask import Flask, request, Response
 import os, sys
 import atexit
-import requests
 import copy
 import threading
 import secrets
+from collections import OrderedDict, namedtuple
 
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
 from cryptography.exceptions import InvalidSignature
 
-def load_public_key_from_pem(pem_string):
-    return serialization.load_pem_public_key(pem_string.encode('utf-8'))
+from ledger import BalanceLedger, transaction_fields_valid, transaction_id
+from storage import ChainStore, StoredChain, SEGMENT_SIZE, PRUNED_SEGMENT_SIZE
+from snapshot import write_snapshot, load_latest_snapshot, snapshot_heights, SHUTDOWN_PREFIX
+from mining import build_block_template, search_nonce, ParallelMiner
+from difficulty import TargetSchedule, MAX_TARGET, block_work, difficulty_of, meets_target, target_bytes, target_hex
+from keys import KeyRegistry
+from verification import BatchVerifier, SignatureCache
+from chainsync import ChainSync, block_header
+from gossip import Broadcaster, InventoryRelay
+from compact import make_compact_block, reconstruct, assemble, compact_valid, block_transactions_valid
+from mempool import Mempool
+from chainindex import ChainIndex
+from blocktree import BlockTree
+from aionode import run_server
+from header import block_hash, block_version, fields_valid, is_hash_hex, merkle_valid, LEGACY_VERSION
+from merkle import tx_leaf, merkle_branch
+from codec import MEDIA_TYPE, CHAIN_MIMETYPES, CodecError, decode_block, decode_transaction, encode_chain_header, encode_chain_block
+
+# Niezmienny widok czubka łańcucha dla czytelników — podmieniany w całości po każdej zmianie łańcucha.
+# Salda i sumy oczekujących kwot z mempoola to niezmienne widoki z tej samej chwili, więc odczyt nie trafi w połowę reorganizacji.
+ChainView = namedtuple("ChainView", ["height", "tip", "target", "balances", "pending"])
 
 def get_node_id_from_public_key(public_key):
     # Serializujemy klucz publiczny do bajtów
@@ -37,112 +56,326 @@ def load_known_nodes(file_path="known_nodes.txt"):
     return nodes or ["127.0.0.1:5000"]
 
 class Blockchain:
-    def __init__(self, node_address, node_id, public_key, public_key_pem, known_nodes):
+    def __init__(self, node_address, node_id, public_key, public_key_pem, known_nodes, prune_depth=None):
         self.chain = []
-        self.transactions = []
+        # Jeden pisarz naraz: zmiany łańcucha, mempoola i ledgera przechodzą przez tę blokadę.
+        # Czytelnicy jej nie biorą — korzystają z `view` i pojedynczych (atomowych) odczytów słowników.
+        self.lock = threading.RLock()
+        self.view = ChainView(0, None, None, {}, {})
+        # Niezatwierdzone transakcje: indeks po hashu i nadawcy, limity liczby/bajtów i wieku
+        self.mempool = Mempool()
+        # Co ile sekund usuwamy przeterminowane transakcje, gdy node nic nie przyjmuje ani nie kopie
+        self.mempool_sweep_interval = 60
+        # Limity bloku budowanego przez naszego kopacza (liczba transakcji łącznie z nagrodą i bajty)
+        self.max_block_transactions = 500
+        self.max_block_bytes = 256 * 1024
         self.reward = 50
-        self.difficulty = 2
+        # Cel PoW przeliczany co `retarget_interval` bloków tak, by blok wypadał średnio co `block_interval` sekund
+        self.retarget_interval = 10
+        self.block_interval = 10
+        self.targets = TargetSchedule(self.retarget_interval, self.block_interval)
+        # Bloki ze znacznikiem czasu zbyt daleko w przyszłości odrzucamy — zaniżałyby cel przy przeliczeniu
+        self.max_future_drift = 120
+        # ...a z przeszłości: znacznik musi być późniejszy niż mediana tylu poprzednich bloków (ochrona przed timewarpem)
+        self.median_time_span = 11
         self.mining_in_progress = False
+        self.miner = None
+        # Ostatnie zadania kopania do odczytu przez /mine/<job_id> — starsze wypadają
+        self.mining_jobs = OrderedDict()
+        self.max_mining_jobs = 100
+        self.current_mining_job = None
         self.nodes = {}
         self.node_address = node_address
-        self.known_transaction_hashes = set()
         self.node_id = node_id
         self.public_key = public_key
         self.public_key_pem = public_key_pem
         self.pending_challenges = {}
+        # Wysyłka do peerów w tle — nagłówek pozwala odbiorcy rozpoznać nadawcę
+        self.broadcaster = Broadcaster(headers={"X-Node-Address": node_address})
+        self.relay = InventoryRelay(self.broadcaster, self.has_inventory_item, self.inventory_item)
+        # Tryb kompaktowy: nowe bloki wysyłamy jako nagłówek + krótkie ID transakcji
+        self.compact_blocks = True
+        # Bloki kompaktowe czekające na brakujące transakcje (hash -> (blok, transakcje z lukami, termin))
+        self.pending_compact = OrderedDict()
+        self.compact_timeout = 60
+        self.compact_stats = {"received": 0, "reconstructed": 0, "round_trips": 0, "missing_txs": 0}
+        self.key_registry = KeyRegistry()
+        self.verifier = BatchVerifier()
+        self.signature_cache = SignatureCache()
+        self.ledger = BalanceLedger()
+        # Boczne gałęzie sięgają tak głęboko, jak dane cofania ledgera — przełączenie nie przelicza sald od zera
+        self.tree = BlockTree(max_depth=self.ledger.undo_depth)
+        # Węzeł przycięty trzyma tylko `prune_depth` ostatnich bloków i stan sald (None = pełny łańcuch).
+        # Reorganizacja nie sięga głębiej niż boczne gałęzie, więc bloków musi być co najmniej dwa razy tyle.
+        if prune_depth is not None and prune_depth < 2 * self.tree.max_depth:
+            raise ValueError(f"Węzeł przycięty musi trzymać co najmniej {2 * self.tree.max_depth} bloków")
+        self.prune_depth = prune_depth
+        # Polityka fsync magazynu: "always", "interval" (co fsync_interval bloków) lub "never".
+        # Przycięty węzeł używa mniejszych segmentów — usuwane są tylko całe segmenty.
+        self.store = ChainStore("chaindata", fsync_policy="interval", fsync_interval=10,
+                                segment_size=SEGMENT_SIZE if prune_depth is None else PRUNED_SEGMENT_SIZE)
+        self.snapshot_dir = os.path.join("chaindata", "snapshots")
+        # Przycinamy najwyżej do starszego z dwóch snapshotów — od niego da się odtworzyć salda
+        self.snapshot_interval = 1000 if prune_depth is None else prune_depth // 2
+        # Trwałe indeksy: hash bloku -> wysokość, hash transakcji -> (wysokość, pozycja)
+        self.index = ChainIndex(os.path.join("chaindata", "index.sqlite"))
         
         self.load_blockchain()
         if not self.chain:
             genesis_block = self.proof_of_work()
             self.create_block(genesis_block)
+        self.publish_view()
 
         self.nodes[node_id] = {
             "ip": self.node_address,
             "public_key": public_key_pem
         }
+        self.key_registry.add(node_id, public_key_pem, public_key)
         
         self.register_with_known_nodes(known_nodes)
+        threading.Thread(target=self.sweep_mempool_loop, daemon=True).start()
 
     
     def create_block(self, block):
-        self.chain.append(block)
-        self.transactions = []
-        self.save_blockchain()
+        with self.lock:
+            # Nowy czubek — przerywamy kopanie na starym rodzicu
+            self.cancel_mining()
+            self.chain.append(block)
+            self.ledger.apply_block(block)
+            self.index.add_block(len(self.chain) - 1, block)
+            # Usuwamy tylko transakcje zatwierdzone w bloku — reszta czeka na kolejny
+            self.mempool.remove_confirmed(block)
+            self.tree.prune(len(self.chain))
+
+            if len(self.chain) % self.snapshot_interval == 0:
+                self.save_snapshot()
+                self.prune()
+            self.publish_view()
         return block
 
+    def publish_view(self):
+        # Przeterminowane transakcje nie powinny zawyżać oczekujących kwot w widoku
+        self.mempool.evict()
+        self.view = ChainView(len(self.chain), self.chain[-1]["hash"] if self.chain else None, self.next_target(),
+                              self.ledger.snapshot(), self.mempool.snapshot())
+
+    def publish_pending(self):
+        # Zmiana samego mempoola — salda z łańcucha zostają te same
+        self.mempool.evict()
+        self.view = self.view._replace(pending=self.mempool.snapshot())
+
+    def sweep_mempool_loop(self):
+        while True:
+            time.sleep(self.mempool_sweep_interval)
+            with self.lock:
+                self.publish_pending()
+
     def get_previous_block(self):
         return self.chain[-1]
 
-    def proof_of_work(self):
-        previous_block = self.get_previous_block()
-        previous_hash = previous_block["hash"]
-        proof = 0  # Startujemy od 0, zamiast 1
-        
-        while True:
-            copy_list = copy.deepcopy(self.transactions)
-            
-            transaction_data = {
-                'sender': "*",
-                'receiver': self.node_id,
-                'amount': self.reward,
-                'timestamp': time.time()
-            }
-            copy_list.append(transaction_data)
+    def create_block_template(self):
+        # Nagrodę podpisujemy raz na blok, a nie przy każdej próbie nonce
+        transaction_data = {
+            'sender': "*",
+            'receiver': self.node_id,
+            'amount': self.reward,
+            'timestamp': time.time()
+        }
 
-            tx = json.dumps(transaction_data, sort_keys=True)
+        tx = json.dumps(transaction_data, sort_keys=True)
 
-            signature = private_key.sign(
-                tx.encode(),
-                padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
-                hashes.SHA256()
-            )
+        signature = private_key.sign(
+            tx.encode(),
+            padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+            hashes.SHA256()
+        )
 
-            #signature = bytes.fromhex(signature)
+        transaction_data['signature'] = signature.hex()
 
-            transaction_data['signature'] = signature.hex()
-            
-            block = {
-                'index': previous_block['index'] + 1,
-                'timestamp': time.time(),
-                'transactions': copy_list,
-                'proof': proof,
-                'previous_hash': previous_hash
-            }
-            block['hash'] = self.hash(block)
-            
-            if block['hash'][:self.difficulty] == '0' * self.difficulty:
-                break
+        # Ograniczony wybór z mempoola — reszta transakcji trafi do kolejnych bloków
+        transactions = self.mempool.select(
+            self.max_block_transactions - 1,
+            self.max_block_bytes - len(json.dumps(transaction_data)),
+            self.ledger.get
+        )
+        # Wybór usuwa przeterminowane transakcje — widok oczekujących kwot też ich nie liczy
+        self.publish_pending()
+        return build_block_template(self.get_previous_block(), copy.deepcopy(transactions), transaction_data)
+
+    def proof_of_work(self):
+        template = self.create_block_template()
+        proof = search_nonce(template, target_bytes(self.next_target()))
+        block = template.finalize(proof)
 
-            proof += 1
-        
         print(f"Blok wykopany! Proof: {proof}, Hash: {block['hash']}")
         return block
 
+    def start_mining_job(self):
+        """Uruchamia kopanie w tle na wszystkich rdzeniach i zwraca identyfikator zadania."""
+        # Sprawdzenie i ustawienie flagi pod blokadą — dwa równoległe /mine nie uruchomią dwóch zadań
+        with self.lock:
+            if self.mining_in_progress:
+                return self.current_mining_job
+
+            self.mining_in_progress = True
+            if self.miner is None:
+                self.miner = ParallelMiner()
+
+            job_id = secrets.token_hex(8)
+            self.mining_jobs[job_id] = {
+                "job_id": job_id,
+                "status": "running",
+                "started": time.time(),
+                "restarts": 0,
+                "block": None
+            }
+            while len(self.mining_jobs) > self.max_mining_jobs:
+                self.mining_jobs.popitem(last=False)
+            self.current_mining_job = job_id
+
+        threading.Thread(target=self.run_mining_job, args=(job_id,), daemon=True).start()
+        return job_id
+
+    def run_mining_job(self, job_id):
+        job = self.mining_jobs[job_id]
+        try:
+            while True:
+                with self.lock:
+                    template = self.create_block_template()
+                    target = target_bytes(self.next_target())
+                parent_hash = template.block["previous_hash"]
+                is_current = lambda: self.get_previous_block()["hash"] == parent_hash
+
+                proof = self.miner.search(template, target, is_current)
+
+                # Przerwano albo czubek zmienił się w trakcie — zaczynamy od nowego rodzica
+                if proof is None or not is_current():
+                    job["restarts"] += 1
+                    continue
+
+                block = template.finalize(proof)
+                with self.lock:
+                    # Czubek sprawdzamy ponownie pod blokadą — blok od peera mógł wejść przed nami
+                    if not is_current():
+                        job["restarts"] += 1
+                        continue
+                    self.create_block(block)
+                print(f"Blok wykopany! Proof: {proof}, Hash: {block['hash']}")
+                self.announce_new_block(block)
+
+                # Sam blok jest w łańcuchu — zadanie pamięta tylko jego hash i wysokość
+                job["block"] = {"hash": block["hash"], "index": block["index"]}
+                status = "done"
+                break
+        except Exception as e:
+            job["error"] = str(e)
+            status = "failed"
+        finally:
+            with self.lock:
+                self.current_mining_job = None
+                self.mining_in_progress = False
+                job["finished"] = time.time()
+                job["status"] = status
+
+    def cancel_mining(self):
+        if self.miner is not None:
+            self.miner.cancel()
+
 
     def hash(self, block):
-        encoded_block = json.dumps(block, sort_keys=True).encode()
-        return hashlib.sha256(encoded_block).hexdigest()
+        # Bloki v2 hashujemy po binarnym nagłówku, dawne (bez wersji) — po JSON-ie całego bloku
+        return block_hash(block)
+
+    def is_chain_valid(self, chain, previous_block=None, fork=0):
+        """Waliduje bloki doklejane do `previous_block` z naszego łańcucha, leżącego na wysokości `fork` - 1.
+
+        Wysokość podaje wywołujący (z lokalnego łańcucha) — pole index bloków od peera nie jest jeszcze sprawdzone.
+        Bez `previous_block` pierwszy blok łańcucha jest punktem odniesienia.
+        """
+        if previous_block is None:
+            previous_block = chain[0]
+            blocks = chain[1:]
+            targets = self.branch_targets(0, chain)[1:]
+            fork = 0
+        else:
+            blocks = chain
+            targets = self.branch_targets(fork, chain)
 
-    def is_chain_valid(self, chain):
-        previous_block = chain[0]
+        if not self.timestamps_valid(fork, chain):
+            return False
         
-        for block in chain[1:]:
+        for block, target in zip(blocks, targets):
             # Sprawdzamy, czy previous_hash zgadza się z hashem poprzedniego bloku
-            if block['previous_hash'] != previous_block['hash']:
+            if block['previous_hash'] != previous_block['hash'] or block['index'] != previous_block['index'] + 1:
                 return False
             
-            # Sprawdzamy, czy hash bloku spełnia warunek trudności
-            if block['hash'][:self.difficulty] != '0' * self.difficulty:
+            # Sprawdzamy, czy hash bloku spełnia cel obowiązujący na jego wysokości
+            if not meets_target(block['hash'], target):
+                return False
+
+            # Nagłówek v2 obejmuje transakcje tylko przez korzeń Merkle, a innych pól nie obejmuje wcale
+            if not fields_valid(block) or not merkle_valid(block):
                 return False
 
             previous_block = block  # Przechodzimy do następnego bloku
+
+        # Podpisy wszystkich transakcji łańcucha sprawdzamy jedną równoległą paczką
+        if self.verify_chain_signatures(chain) is not None:
+            return False
         
         return True
-    
-    def transaction_hash(self, tx):
-        tx_copy = tx.copy()
-        return hashlib.sha256(json.dumps(tx_copy, sort_keys=True).encode()).hexdigest()
 
+    def signature_items(self, transactions, items, positions, key):
+        """Dopisuje do paczki dane do weryfikacji podpisów. Zwraca pozycję pierwszej wadliwej transakcji."""
+        for position, tx in enumerate(transactions):
+            sender = tx.get('sender')
+            if sender == "*":
+                continue  # pomiń reward
+
+            if sender not in self.nodes or not isinstance(tx.get('signature'), str):
+                return key(position)
+
+            # Transakcje sprawdzone już przy przyjęciu do mempoola nie wymagają ponownej weryfikacji
+            if self.signature_cache.contains(transaction_id(tx), tx['signature']):
+                continue
+
+            try:
+                signature = bytes.fromhex(tx['signature'])
+            except ValueError:
+                return key(position)
+
+            # Surowe dane transakcji bez podpisu
+            tx_data = json.dumps({
+                'sender': sender,
+                'receiver': tx.get('receiver'),
+                'amount': tx.get('amount'),
+                'timestamp': tx.get('timestamp')
+            }, sort_keys=True)
+
+            items.append((sender, self.nodes[sender]["public_key"], signature, tx_data.encode()))
+            positions.append(key(position))
+        return None
+
+    def verify_transactions(self, transactions):
+        """Zwraca indeks pierwszej transakcji bloku z błędnym podpisem albo None."""
+        items, positions = [], []
+        invalid = self.signature_items(transactions, items, positions, lambda position: position)
+
+        bad = self.verifier.verify(items, self.key_registry.get)
+        return invalid if bad is None else positions[bad]
+
+    def verify_chain_signatures(self, chain):
+        """Zwraca (wysokość, indeks transakcji) pierwszego błędnego podpisu w łańcuchu albo None."""
+        items, positions = [], []
+        invalid = None
+        for height, block in enumerate(chain):
+            invalid = self.signature_items(block['transactions'], items, positions, lambda position: (height, position))
+            if invalid is not None:
+                break  # Dalszych bloków nie ma sensu sprawdzać
+
+        bad = self.verifier.verify(items, self.key_registry.get)
+        return invalid if bad is None else positions[bad]
+    
     def add_transaction(self, sender, receiver, amount, signature, timestamp=None):
         if timestamp is None:
             timestamp = time.time()
@@ -155,31 +388,42 @@ class Blockchain:
         }
 
         tx_data = json.dumps(tx, sort_keys=True)
-        
-        # Weryfikacja podpisu transakcji
-        if not self.verify_signature(sender, bytes.fromhex(str(signature)), tx_data):
-            print("❌ Nieprawidłowy podpis transakcji!")
-            return False
-        
-        if sender != "*" and self.get_temp_balance(sender) < amount:
-            print(f"❌ Brak środków. Tymczasowy balans: {self.get_temp_balance(sender)} | Kwota: {amount}")
-            return False
 
         # Tworzenie hash transakcji
-        tx_hash = self.transaction_hash(tx)
+        tx_hash = transaction_id(tx)
 
+        if tx_hash in self.mempool or self.is_confirmed(tx_hash):
+            return False  # Już dodana
+        
+        # Weryfikacja podpisu transakcji — pomijana, gdy ta para hash/podpis była już sprawdzona
+        if not self.signature_cache.contains(tx_hash, str(signature)):
+            if not self.verify_signature(sender, bytes.fromhex(str(signature)), tx_data):
+                print("❌ Nieprawidłowy podpis transakcji!")
+                return False
+            self.signature_cache.add(tx_hash, str(signature))
+        
         tx["signature"] = signature
 
-        if tx_hash in self.known_transaction_hashes:
-            return False  # Już dodana
+        # Podpis sprawdzony bez blokady; saldo i duplikaty ponownie już pod nią, razem z dodaniem
+        with self.lock:
+            if tx_hash in self.mempool or self.is_confirmed(tx_hash):
+                return False
 
-        self.known_transaction_hashes.add(tx_hash)
-        self.transactions.append(tx)
-        return True
+            # Pod blokadą liczymy z bieżącego ledgera i mempoola, nie z opublikowanego widoku
+            temp_balance = self.ledger.get(sender) + self.mempool.pending_delta(sender)
+            if sender != "*" and temp_balance < amount:
+                print(f"❌ Brak środków. Tymczasowy balans: {temp_balance} | Kwota: {amount}")
+                return False
+
+            self.mempool.add(tx, tx_hash)
+            self.publish_pending()
+            return tx_hash in self.mempool
     
     def verify_signature(self, sender, signature, transaction_data):
+        if sender not in self.nodes:
+            return False
         try:
-            public_key = load_public_key_from_pem(self.nodes[sender]["public_key"])
+            public_key = self.key_registry.get(sender, self.nodes[sender]["public_key"])
             public_key.verify(
                 signature,
                 transaction_data.encode(),
@@ -191,67 +435,470 @@ class Blockchain:
             return False
 
     def save_blockchain(self):
-        with open("blockchain.json", "w") as file:
-            json.dump(self.chain, file, indent=4)
-    
+        # Bloki są dopisywane na bieżąco — wystarczy zrzucić bufory na dysk
+        with self.lock:
+            self.store.sync()
+            if self.chain:
+                self.save_snapshot(shutdown=True)
+
+    def save_snapshot(self, shutdown=False):
+        self.store.sync()
+        # Razem z saldami zapisujemy harmonogram celów PoW — po starcie nie liczymy go od genezy
+        # (a węzeł przycięty nie mógłby, bo nie ma już starych bloków)
+        self.next_target()
+        targets = self.targets.to_state(len(self.chain))
+        # Przy zamknięciu trzymamy tylko najnowszy — przyspiesza start, ale nie wypiera okresowych
+        if shutdown:
+            write_snapshot(self.snapshot_dir, self.ledger, len(self.chain), self.chain[-1]["hash"], keep=1, targets=targets, prefix=SHUTDOWN_PREFIX)
+        else:
+            write_snapshot(self.snapshot_dir, self.ledger, len(self.chain), self.chain[-1]["hash"], targets=targets)
+
+    def prune(self):
+        """Tryb przycięty: usuwa bloki starsze niż `prune_depth` ostatnich, ale nie nowsze
+        niż starszy z zachowanych snapshotów — od niego da się odtworzyć salda po reorganizacji."""
+        if self.prune_depth is None:
+            return
+        with self.lock:
+            heights = snapshot_heights(self.snapshot_dir)
+            if len(heights) < 2:
+                return
+            height = min(len(self.chain) - self.prune_depth, min(heights))
+            if height <= self.store.prune_height:
+                return
+
+            self.ledger.forget(self.store.iter_blocks(self.store.prune_height, height))
+            self.index.prune(height)
+            self.targets.forget(height)
+            self.chain.prune(height)
+            print(f"✂️ Przycięto łańcuch do wysokości {height}")
+
+    def is_pruned(self, height):
+        return height < self.store.prune_height
+
+    def is_confirmed(self, tx_hash):
+        # Ledger przyciętego węzła zna tylko transakcje z zachowanych bloków — starsze są w indeksie
+        if self.ledger.is_confirmed(tx_hash):
+            return True
+        return self.store.prune_height > 0 and self.index.transaction_location(tx_hash) is not None
+
+    def can_reorganize(self, fork):
+        # Węzeł przycięty nie odtworzy sald sprzed zachowanych bloków — głębsze zmiany odrzuca.
+        # Dopóki nic nie przycięto, salda da się zawsze policzyć od genezy
+        if not self.store.prune_height:
+            return True
+        # Bez danych cofania (np. po restarcie) salda wracają ze snapshotu — musi być okresowy pod rozwidleniem.
+        # Starszy z dwóch okresowych leży co najmniej `snapshot_interval` (>= tree.max_depth) pod czubkiem
+        oldest = min(snapshot_heights(self.snapshot_dir), default=0)
+        return fork > self.store.prune_height and fork >= max(len(self.chain) - self.tree.max_depth, oldest)
+
+    def restore_ledger(self, height):
+        """Odtwarza salda na wysokości `height`: z najnowszego pasującego snapshotu i bloków po nim.
+        Zwraca użyty snapshot albo None (wtedy salda liczone są od genezy)."""
+        start = 0
+        snapshot = load_latest_snapshot(self.snapshot_dir, self.store, max_height=height)
+        if snapshot:
+            self.ledger.load_state(snapshot)
+            start = snapshot["height"]
+            # Snapshot mógł pamiętać transakcje z bloków przyciętych później — liczymy je z zachowanych
+            if self.store.prune_height:
+                self.ledger.recount(self.store.iter_blocks(self.store.prune_height, start))
+        else:
+            self.ledger.rebuild([])
+
+        for block in self.store.iter_blocks(start, height):
+            self.ledger.apply_block(block)
+        return snapshot
+
     def load_blockchain(self):
-        if os.path.exists("blockchain.json"):
-            with open("blockchain.json", "r") as file:
-                self.chain = json.load(file)
+        # Jednorazowa migracja z dawnego blockchain.json
+        self.store.migrate_from_json("blockchain.json")
+        self.chain = StoredChain(self.store)
+
+        # Stan pochodny wczytujemy z najnowszego snapshotu i odtwarzamy tylko bloki po nim
+        snapshot = self.restore_ledger(len(self.chain))
+        if snapshot and "targets" in snapshot:
+            self.targets.load_state(snapshot["targets"])
+
+        # Indeks dogania magazyn (np. po migracji albo gdy proces zakończył się przed jego zapisem)
+        self.index.catch_up(self.store)
+
+        if snapshot:
+            print(f"📸 Snapshot z wysokości {snapshot['height']}, odtworzono {len(self.chain) - snapshot['height']} bloków")
+        if self.store.prune_height:
+            print(f"✂️ Węzeł przycięty: bloki od wysokości {self.store.prune_height}")
 
     def replace_chain(self):
-        longest_chain = None
-        max_length = len(self.chain)
+        # Pobieramy tylko nagłówki, a bloki jedynie od wspólnego przodka
+        return ChainSync(self).sync()
+
+    def replace_suffix(self, fork, blocks, check_balances=False):
+        """Podmienia bloki od wysokości `fork` na `blocks`.
+
+        Z `check_balances` salda nowej gałęzi są sprawdzane blok po bloku; przy braku środków
+        nic się nie zmienia, błędny blok wypada z drzewa razem z potomkami, a wynikiem jest False.
+        """
+        with self.lock:
+            reverted = self.chain[fork:]
+            reverted_work = [self.chain_work(height + 1) for height in range(fork, fork + len(reverted))]
+
+            # Cofamy tylko bloki powyżej rozwidlenia, a gdy brak danych do cofnięcia — odtwarzamy ze snapshotu
+            for block in reversed(reverted):
+                if not self.ledger.revert_block(block):
+                    self.restore_ledger(fork)
+                    break
+
+            for n, block in enumerate(blocks):
+                if check_balances and self.balance_error(block) is not None:
+                    for applied in reversed(blocks[:n]):
+                        self.ledger.revert_block(applied)
+                    for restored in reverted:
+                        self.ledger.apply_block(restored)
+                    self.tree.discard(block["hash"])
+                    return False
+                self.ledger.apply_block(block)
+
+            self.cancel_mining()
+            self.chain.replace_tail(fork, blocks)
+            self.index.replace_tail(fork, blocks)
+            self.targets.truncate(fork)
+
+            # Odcięte bloki zostają w drzewie jako boczna gałąź — powrót na nią nie wymaga pobierania
+            for block in blocks:
+                self.tree.remove(block["hash"])
+            for height, (block, work) in enumerate(zip(reverted, reverted_work), start=fork):
+                self.tree.add(block, height, work)
+            self.tree.prune(len(self.chain))
+
+            # Transakcje z nowej gałęzi wypadają z mempoola, a te z odciętych bloków do niego wracają
+            for block in blocks:
+                self.mempool.remove_confirmed(block)
+            for block in reverted:
+                for tx in block["transactions"]:
+                    tx_hash = transaction_id(tx)
+                    if tx["sender"] != "*" and not self.is_confirmed(tx_hash):
+                        self.mempool.add(tx, tx_hash)
+            self.publish_view()
+        return True
 
-        for node_id, info in self.nodes.items():
-            if info["ip"] == self.node_address:
-                continue
-            try:
-                response = requests.get(f"http://{info['ip']}/chain")
-                if response.status_code == 200:
-                    length = response.json()["length"]
-                    chain = response.json()["chain"]
-                    if length > max_length and self.is_chain_valid(chain):
-                        max_length = length
-                        longest_chain = chain
-            except:
-                continue
-            
-        if longest_chain:
-            self.chain = longest_chain
-            self.save_blockchain()
-            return True
-        return False
+    def timestamp_at(self, height):
+        return self.chain[height]["timestamp"]
+
+    def next_target(self):
+        """Cel PoW kolejnego bloku głównego łańcucha."""
+        with self.lock:
+            return self.targets.target_at(len(self.chain), self.timestamp_at)
+
+    def chain_work(self, height):
+        """Łączna praca pierwszych `height` bloków głównego łańcucha."""
+        with self.lock:
+            return self.targets.chain_work(height, self.timestamp_at)
+
+    def branch_timestamps(self, fork, blocks):
+        """Znacznik czasu na danej wysokości: z gałęzi od wysokości `fork`, poniżej — z głównego łańcucha."""
+        return lambda height: blocks[height - fork]["timestamp"] if height >= fork else self.timestamp_at(height)
+
+    def branch_targets(self, fork, blocks):
+        """Cele PoW kolejnych bloków (lub nagłówków) gałęzi odchodzącej od głównego łańcucha na wysokości `fork`."""
+        with self.lock:
+            schedule = self.targets.branch(fork)
+        timestamp_at = self.branch_timestamps(fork, blocks)
+        return [schedule.target_at(fork + n, timestamp_at) for n in range(len(blocks))]
+
+    def median_time_past(self, height, timestamp_at):
+        """Mediana znaczników czasu `median_time_span` bloków poniżej wysokości `height` (bez przyciętych)."""
+        start = max(height - self.median_time_span, self.store.prune_height)
+        timestamps = sorted(timestamp_at(h) for h in range(start, height))
+        return timestamps[len(timestamps) // 2]
+
+    def timestamps_valid(self, fork, blocks):
+        """Czy każdy blok (lub nagłówek) gałęzi od wysokości `fork` jest późniejszy niż mediana poprzednich bloków."""
+        timestamp_at = self.branch_timestamps(fork, blocks)
+        for height, block in enumerate(blocks, start=fork):
+            timestamp = block.get("timestamp")
+            if not isinstance(timestamp, (int, float)):
+                return False
+            if height > self.store.prune_height and timestamp <= self.median_time_past(height, timestamp_at):
+                return False
+        return True
+
+    def is_known_block(self, block_hash):
+        return self.store.height_of(block_hash) is not None or block_hash in self.tree
+
+    def accept_block(self, block):
+        """Waliduje blok od peera i dopisuje go do łańcucha. Zwraca (odpowiedź, kod HTTP).
+
+        Sprawdzenia niezależne od stanu (hash, Merkle, podpisy) idą bez blokady;
+        rodzic i salda są sprawdzane ponownie pod blokadą, tuż przed dopisaniem.
+        """
+        if not fields_valid(block):
+            return {"message": "Blok zawiera pola spoza nagłówka"}, 400
+
+        # Kopia bloku bez pola hash do ponownego przeliczenia
+        block_copy = block.copy()
+        block_copy.pop("hash", None)
+
+        if block['hash'] != self.hash(block_copy):
+            return {"message": "Hash nieprawidłowy"}, 400
+
+        timestamp = block.get("timestamp")
+        if not isinstance(timestamp, (int, float)) or timestamp > time.time() + self.max_future_drift:
+            return {"message": "Nieprawidłowy znacznik czasu"}, 400
+
+        # Wstępnie, bez blokady: blok na czubku musi spełnić bieżący cel, a boczny — przynajmniej najłatwiejszy
+        view = self.view
+        if not meets_target(block['hash'], view.target if view.tip == block["previous_hash"] else MAX_TARGET):
+            return {"message": "Blok nie spełnia trudności"}, 400
+
+        if self.is_known_block(block["hash"]):
+            return {"message": "Block already known"}, 200
+
+        # Nie weryfikujemy podpisów bloku, którego rodzica nie znamy
+        if view.tip != block["previous_hash"] and not self.is_known_block(block["previous_hash"]):
+            return {"message": "Block refused"}, 400
+
+        if not merkle_valid(block):
+            return {"message": "Nieprawidłowy korzeń Merkle"}, 400
+
+        # 🛡️ WALIDACJA TRANSAKCJI W BLOKU
+        for tx in block['transactions']:
+            if not transaction_fields_valid(tx) or not all([tx.get('sender'), tx.get('receiver'), tx.get('amount'), tx.get('signature'), tx.get('timestamp')]):
+                return {"message": "Transakcja zawiera niekompletne dane"}, 400
+
+        # ✅ Weryfikacja wszystkich podpisów jedną paczką
+        bad = self.verify_transactions(block['transactions'])
+        if bad is not None:
+            sender = block['transactions'][bad]['sender']
+            return {"message": f"Nieprawidłowy podpis dla transakcji od {sender}", "index": bad}, 400
+
+        with self.lock:
+            # Czubek mógł się zmienić w trakcie weryfikacji podpisów; blok na innym rodzicu trafia do drzewa
+            if self.get_previous_block()["hash"] != block["previous_hash"]:
+                return self.accept_side_block(block)
+
+            # Pole index musi odpowiadać wysokości w naszym łańcuchu (numerujemy od 1)
+            if block.get("index") != len(self.chain) + 1:
+                return {"message": "Nieprawidłowy indeks bloku"}, 400
+
+            if not meets_target(block['hash'], self.next_target()):
+                return {"message": "Blok nie spełnia trudności"}, 400
+
+            if not self.timestamps_valid(len(self.chain), [block]):
+                return {"message": "Nieprawidłowy znacznik czasu"}, 400
+
+            error = self.balance_error(block)
+            if error is not None:
+                return error
+
+            # Jeśli wszystko OK, dodaj blok (create_block przerywa też kopanie na starym czubku)
+            self.create_block(block)
+
+        return {"message": "Block accepted"}, 201
+
+    def balance_error(self, block):
+        """Sprawdza, czy nadawcy bloku mają środki według ledgera. Zwraca (odpowiedź, kod HTTP) albo None."""
+        temp_balances = {}
+        for tx in block['transactions']:
+            sender = tx['sender']
+            receiver = tx['receiver']
+            amount = tx['amount']
+
+            if sender == "*":
+                continue  # pomiń reward
+
+            # Oblicz tymczasowy balans na podstawie łańcucha
+            if sender not in temp_balances:
+                temp_balances[sender] = self.ledger.get(sender)
+            if receiver not in temp_balances:
+                temp_balances[receiver] = self.ledger.get(receiver)
+
+            # Sprawdzenie czy nadawca ma środki
+            if temp_balances[sender] < amount:
+                return {"message": f"Niewystarczające środki u {sender}"}, 400
+
+            # Zaktualizuj tymczasowe salda
+            temp_balances[sender] -= amount
+            temp_balances[receiver] += amount
+        return None
+
+    def accept_side_block(self, block):
+        """Blok odchodzący od znanego bloku spod czubka (wywoływane pod blokadą).
+
+        Zapamiętujemy go w drzewie, a gdy jego gałąź ma więcej łącznej pracy niż główny łańcuch,
+        przechodzimy na nią — cofając i dokładając tylko bloki powyżej rozwidlenia.
+        """
+        parent = self.tree.get(block["previous_hash"])
+        if parent is not None:
+            height, work = parent[1] + 1, parent[2]
+        else:
+            parent_height = self.store.height_of(block["previous_hash"])
+            if parent_height is None:
+                return {"message": "Block refused"}, 400
+            height, work = parent_height + 1, self.chain_work(parent_height + 1)
+
+        if height < len(self.chain) - self.tree.max_depth:
+            return {"message": "Block refused"}, 400
+
+        if block.get("index") != height + 1:
+            return {"message": "Nieprawidłowy indeks bloku"}, 400
+
+        # Gałąź musi dochodzić do głównego łańcucha (jej początek mógł już wypaść z drzewa)
+        blocks = self.tree.branch(block["previous_hash"]) + [block]
+        fork = height + 1 - len(blocks)
+        if fork > len(self.chain) or not self.can_reorganize(fork) or (fork and self.chain[fork - 1]["hash"] != blocks[0]["previous_hash"]):
+            return {"message": "Block refused"}, 400
+
+        if not self.timestamps_valid(fork, blocks):
+            return {"message": "Nieprawidłowy znacznik czasu"}, 400
+
+        # Cel zależy od znaczników czasu bloków tej gałęzi, więc liczymy go od rozwidlenia
+        target = self.branch_targets(fork, blocks)[-1]
+        if not meets_target(block['hash'], target):
+            return {"message": "Blok nie spełnia trudności"}, 400
+
+        work += block_work(target)
+        self.tree.add(block, height, work)
+        if work <= self.chain_work(len(self.chain)):
+            return {"message": "Blok zapisany w bocznej gałęzi", "height": height}, 200
+
+        depth = len(self.chain) - fork
+        if not self.replace_suffix(fork, blocks, check_balances=True):
+            return {"message": "Gałąź zawiera transakcje bez pokrycia"}, 400
+
+        print(f"🔀 Reorganizacja: odcięto {depth} bloków, dołożono {len(blocks)} od wysokości {fork}")
+        return {"message": "Block accepted", "reorg": {"fork": fork, "reverted": depth, "applied": len(blocks)}}, 201
+
+    def peer_addresses(self):
+        return [info["ip"] for info in self.nodes.values() if info["ip"] != self.node_address]
+
+    # Ogłoszenia trafiają do kolejek Broadcastera — nie czekamy na odpowiedzi peerów
 
     def announce_updated_chain(self):
-        for node_id, info in self.nodes.items():
-            if info["ip"] == self.node_address:
-                continue
-            try:
-                requests.get(f"http://{info['ip']}/sync")
-            except:
-                continue
+        self.broadcaster.broadcast(self.peer_addresses(), "GET", "/sync")
 
-    def announce_new_block(self, block):
-        for node_id, info in self.nodes.items():
-            if info["ip"] == self.node_address:
+    def announce_new_block(self, block, exclude=None):
+        if not self.compact_blocks:
+            # Peer dostaje tylko hash, a pełny blok pobiera, jeśli go nie ma
+            self.relay.announce(self.peer_addresses(), "block", block["hash"], exclude)
+            return
+
+        compact = make_compact_block(block)
+        for peer in self.peer_addresses():
+            if peer == exclude or self.relay.knows(peer, block["hash"]):
                 continue
-            try:
-                requests.post(f"http://{info['ip']}/new_block", json=block)
-            except:
-                continue  # Ignorujemy błędy
+            self.relay.mark_known(peer, block["hash"])
+            self.broadcaster.send(peer, "POST", "/cmpctblock", compact, self.on_compact_block_response)
+
+    def on_compact_block_response(self, peer, response):
+        # 202 = peerowi brakuje części transakcji — dosyłamy tylko je
+        if response.status_code != 202:
+            return
+        data = response.json()
+        if not isinstance(data, dict) or not isinstance(data.get("hash"), str):
+            return
+        block = self.store.get_by_hash(data["hash"])
+        if block is None:
+            return
+        # Pozycje podaje peer — każdą najwyżej raz i tylko z zakresu bloku
+        missing = data.get("missing")
+        if not isinstance(missing, list) or len(set(missing)) != len(missing) or not all(
+            type(i) is int and 0 <= i < len(block["transactions"]) for i in missing
+        ):
+            return
+        transactions = [{"index": i, "tx": block["transactions"][i]} for i in missing]
+        self.broadcaster.send(peer, "POST", "/blocktxn", {"hash": data["hash"], "transactions": transactions})
+
+    def accept_compact_block(self, compact):
+        header = compact["header"]
+        block_hash = header["hash"]
+        if self.is_known_block(block_hash):
+            return {"message": "Block already known"}, 200
+
+        # Nagłówek sprawdzamy przed odtwarzaniem z mempoola. Hash v2 nie obejmuje transakcji, więc liczymy go od razu;
+        # dawny blok hashuje też transakcje — jego hash sprawdzi dopiero accept_block
+        if not is_hash_hex(block_hash) or (block_version(header) != LEGACY_VERSION and block_hash != self.hash(header)):
+            return {"message": "Hash nieprawidłowy"}, 400
+
+        view = self.view
+        if not meets_target(block_hash, view.target if view.tip == header["previous_hash"] else MAX_TARGET):
+            return {"message": "Blok nie spełnia trudności"}, 400
+        if view.tip != header["previous_hash"] and not self.is_known_block(header["previous_hash"]):
+            return {"message": "Block refused"}, 400
+
+        with self.lock:
+            self.compact_stats["received"] += 1
+            transactions, missing = reconstruct(compact, self.mempool.transactions())
+            if missing:
+                return self.request_missing_transactions(compact, transactions, missing)
+            self.compact_stats["reconstructed"] += 1
+
+        return self.finish_compact_block(compact, transactions)
+
+    def request_missing_transactions(self, compact, transactions, missing):
+        block_hash = compact["header"]["hash"]
+        with self.lock:
+            now = time.time()
+            self.pending_compact[block_hash] = (compact, transactions, now + self.compact_timeout)
+            self.pending_compact.move_to_end(block_hash)
+            while self.pending_compact and (len(self.pending_compact) > 100 or next(iter(self.pending_compact.values()))[2] < now):
+                self.pending_compact.popitem(last=False)
+
+            self.compact_stats["round_trips"] += 1
+            self.compact_stats["missing_txs"] += len(missing)
+        return {"hash": block_hash, "missing": missing}, 202
+
+    def accept_block_transactions(self, payload):
+        # Oczekujący blok usuwamy dopiero po przyjęciu — błędna albo niepełna odpowiedź nie przekreśla odtworzenia
+        with self.lock:
+            entry = self.pending_compact.get(payload.get("hash"))
+        if entry is None or entry[2] < time.time():
+            return {"message": "Brak oczekującego bloku"}, 400
+
+        compact, holes, _ = entry
+        indices = [item["index"] for item in payload.get("transactions", [])]
+        if len(set(indices)) != len(indices) or not all(0 <= i < len(holes) and holes[i] is None for i in indices):
+            return {"message": "Nieprawidłowe pozycje transakcji"}, 400
+
+        transactions = list(holes)
+        for item in payload.get("transactions", []):
+            transactions[item["index"]] = item["tx"]
+
+        if any(tx is None for tx in transactions):
+            return {"message": "Nadal brakuje transakcji"}, 400
+
+        response, status = self.finish_compact_block(compact, transactions, from_mempool=False)
+        if status < 400:
+            with self.lock:
+                self.pending_compact.pop(payload["hash"], None)
+        return response, status
+
+    def finish_compact_block(self, compact, transactions, from_mempool=True):
+        response, status = self.accept_block(assemble(compact, transactions))
+
+        # Kolizja krótkich ID podstawiła złą transakcję — prosimy o wszystkie spoza nagród.
+        # W bloku v2 widać ją tylko jako zły korzeń Merkle; hash obejmuje transakcje tylko w dawnym formacie
+        collision = "Nieprawidłowy korzeń Merkle" if block_version(compact["header"]) != LEGACY_VERSION else "Hash nieprawidłowy"
+        if from_mempool and status == 400 and response.get("message") == collision:
+            prefilled = {item["index"] for item in compact["prefilled"]}
+            missing = [i for i in range(len(transactions)) if i not in prefilled]
+            holes = [tx if i in prefilled else None for i, tx in enumerate(transactions)]
+            return self.request_missing_transactions(compact, holes, missing)
+        return response, status
 
     def announce_new_node(self, new_nodes):
-        for node_id, info in self.nodes.items():
-            if info["ip"] == self.node_address:
-                continue
-            try:
-                requests.post(
-                    f"http://{info['ip']}/register_node",
-                    json={"nodes": new_nodes}
-                )
-            except:
-                continue
+        self.broadcaster.broadcast(self.peer_addresses(), "POST", "/register_node", {"nodes": new_nodes})
+
+    def announce_transaction(self, tx, exclude=None):
+        self.relay.announce(self.peer_addresses(), "tx", transaction_id(tx), exclude)
+
+    def has_inventory_item(self, kind, item_hash):
+        if kind == "tx":
+            return item_hash in self.mempool or self.is_confirmed(item_hash)
+        return self.is_known_block(item_hash)
+
+    def inventory_item(self, kind, item_hash):
+        if kind == "tx":
+            return self.mempool.get(item_hash)
+        return self.store.get_by_hash(item_hash) or self.tree.block(item_hash)
 
     def register_with_known_nodes(self, known_nodes):
         my_node_data = {
@@ -267,7 +914,7 @@ class Blockchain:
 
             try:
                 # 1️⃣ POBIERANIE CHALLENGE
-                response = requests.post(f"http://{node}/register_node", json={"nodes": [my_node_data]})
+                response = self.broadcaster.session.post(f"http://{node}/register_node", json={"nodes": [my_node_data]}, timeout=self.broadcaster.timeout)
                 if response.status_code != 200:
                     print(f"❌ Brak odpowiedzi challenge od {node}")
                     continue
@@ -295,11 +942,13 @@ class Blockchain:
                     "node_id": self.node_id,
                     "signature": signature_hex
                 }
-                verify_response = requests.post(f"http://{node}/verify_node", json=verify_payload)
+                verify_response = self.broadcaster.session.post(f"http://{node}/verify_node", json=verify_payload, timeout=self.broadcaster.timeout)
 
                 if verify_response.status_code == 201:
                     nodes = verify_response.json().get("all_nodes", {})
                     self.nodes.update(nodes)
+                    for known_id, info in nodes.items():
+                        self.key_registry.add(known_id, info["public_key"])
                     print(f"✅ Zarejestrowano i zweryfikowano z: {node}. Nody: {list(self.nodes.keys())}")
                 else:
                     print(f"❌ Weryfikacja nie powiodła się w {node}: {verify_response.text}")
@@ -308,26 +957,70 @@ class Blockchain:
                 print(f"❌ Błąd rejestracji z {node}: {e}")
 
 
-    def get_balance(self, node_id):
-        balance = 0
-        for block in self.chain:
-            for tx in block["transactions"]:
-                if tx["receiver"] == node_id:
-                    balance += tx["amount"]
-                elif tx["sender"] == node_id:
-                    balance -= tx["amount"]
-        return balance
+    def transaction_proof(self, tx_hash):
+        """Gałąź Merkle dowodząca, że transakcja jest w bloku."""
+        location = self.index.transaction_location(tx_hash)
+        if location is None:
+            return {"message": "Nie znaleziono transakcji w łańcuchu"}, 404
+
+        height, position = location
+        if self.is_pruned(height):
+            return {"message": "Blok z transakcją został przycięty", "height": height, "pruned": self.store.prune_height}, 404
+        try:
+            block = self.chain[height]
+            tx = block["transactions"][position]
+        except IndexError:
+            return self.chain_changed()
+        if block_version(block) == LEGACY_VERSION:
+            return {"message": "Blok w starym formacie nie ma korzenia Merkle", "height": height}, 400
+
+        leaves = [tx_leaf(tx) for tx in block["transactions"]]
+        return {
+            "tx": tx,
+            "leaf": leaves[position].hex(),
+            "index": position,
+            "branch": merkle_branch(leaves, position),
+            "merkle_root": block["merkle_root"],
+            "block_hash": block["hash"],
+            "height": height
+        }, 200
+
+    def find_transaction(self, tx_hash):
+        """Transakcja z łańcucha (z położeniem i liczbą potwierdzeń) albo oczekująca w mempoolu."""
+        location = self.index.transaction_location(tx_hash)
+        if location is not None:
+            height, position = location
+            if self.is_pruned(height):
+                # Sam blok usunięto — zostało tylko położenie transakcji
+                return {"status": "confirmed", "height": height, "position": position,
+                        "confirmations": len(self.chain) - height, "pruned": True}
+            try:
+                block = self.chain[height]
+                tx = block["transactions"][position]
+            except IndexError:
+                return None  # Blok podmieniony lub przycięty w trakcie odczytu
+            return {
+                "tx": tx,
+                "status": "confirmed",
+                "height": height,
+                "position": position,
+                "block_hash": block["hash"],
+                "confirmations": len(self.chain) - height
+            }
 
-    def get_temp_balance(self, node_id):
-        balance = self.get_balance(node_id)
+        tx = self.mempool.get(tx_hash)
+        if tx is not None:
+            return {"tx": tx, "status": "pending"}
+        return None
 
-        for tx in self.transactions:
-            if tx["receiver"] == node_id:
-                balance += tx["amount"]
-            elif tx["sender"] == node_id:
-                balance -= tx["amount"]
+    def get_balance(self, node_id, view=None):
+        view = view or self.view
+        return view.balances.get(node_id, 0)
 
-        return balance
+    def get_temp_balance(self, node_id, view=None):
+        # Saldo i sumy oczekujących przychodów i wydatków z mempoola z tego samego opublikowanego widoku
+        view = view or self.view
+        return view.balances.get(node_id, 0) + view.pending.get(node_id, 0)
 
     def save_known_nodes(self, file_path="known_nodes.txt"):
         try:
@@ -338,180 +1031,405 @@ class Blockchain:
         except Exception as e:
             print("❌ Błąd zapisu nodów do pliku:", e)
 
-app = Flask(__name__)
+    # --- obsługa żądań HTTP, wspólna dla Flaska i serwera asyncio; zwraca (odpowiedź, kod HTTP) ---
+
+    def mine(self):
+        # Kopanie trwa w tle — od razu zwracamy identyfikator zadania
+        job_id = self.start_mining_job()
+        return {"job_id": job_id, "status": self.mining_jobs[job_id]["status"]}, 202
+
+    def mining_status(self, job_id):
+        job = self.mining_jobs.get(job_id)
+        if job is None:
+            return {"message": "Nieznane zadanie kopania"}, 404
+        return job, 200
+
+    def chain_range(self, view, start, limit):
+        # Węzeł przycięty podaje łańcuch od pierwszego zachowanego bloku
+        start = min(max(start, self.store.prune_height), view.height)
+        stop = view.height if limit is None else min(view.height, start + max(limit, 0))
+        return start, stop
+
+    def chain_etag(self, view, start, stop, mimetype):
+        # ETag zależy od czubka, zakresu i formatu — dopóki czubek się nie zmieni, klient dostaje 304
+        tip = view.tip or ""
+        return hashlib.sha256(f"{tip}:{view.height}:{view.target}:{start}:{stop}:{mimetype}".encode()).hexdigest()[:32]
+
+    def chain_chunks(self, view, start, stop, mimetype):
+        """Bloki strumieniowo: w JSON-ie prosto z magazynu albo w formacie binarnym.
+
+        Gdy reorganizacja albo przycięcie zmieni zakres w trakcie wysyłki, magazyn zgłasza IndexError
+        i odpowiedź zostaje przerwana (bez końcowego fragmentu) — klient nie dostanie mieszanki gałęzi.
+        """
+        if mimetype == MEDIA_TYPE:
+            yield encode_chain_header(view.height, view.target, start, self.store.prune_height)
+            for block in self.store.iter_blocks(start, stop):
+                yield encode_chain_block(block)
+            return
+
+        yield f'{{"length": {view.height}, "dif": {difficulty_of(view.target)}, "target": "{target_hex(view.target)}", "pruned": {self.store.prune_height}, "from": {start}, "chain": ['.encode()
+        for n, raw in enumerate(self.store.iter_raw(start, stop)):
+            yield b", " + raw if n else raw
+        yield b"]}"
+
+    def headers_page(self, view, start, stop):
+        start, stop = max(start, 0), min(view.height if stop is None else stop, view.height)
+        stop = min(stop, start + 2000)
+        if start < stop and self.is_pruned(start):
+            return {"message": "Bloki przycięte", "length": view.height, "pruned": self.store.prune_height}, 404
+        try:
+            headers = [block_header(block) for block in self.chain[start:stop]]
+        except IndexError:
+            return self.chain_changed()
+        return {"length": view.height, "tip": view.tip, "headers": headers}, 200
+
+    def blocks_page(self, view, start, stop):
+        start, stop = max(start, 0), min(view.height if stop is None else stop, view.height)
+        stop = min(stop, start + 500)
+        if start < stop and self.is_pruned(start):
+            return {"message": "Bloki przycięte", "length": view.height, "pruned": self.store.prune_height}, 404
+        try:
+            blocks = self.chain[start:stop]
+        except IndexError:
+            return self.chain_changed()
+        return {"length": view.height, "blocks": blocks}, 200
 
-@app.route('/mine', methods=['GET'])
-def mine_block():
-    if blockchain.mining_in_progress:
-        return "Mining in progress....", 400
+    def chain_changed(self):
+        # Czytelnicy nie biorą blokady — reorganizacja albo przycięcie mogły usunąć blok między sprawdzeniem a odczytem
+        return {"message": "Łańcuch zmienił się w trakcie odczytu", "length": len(self.chain), "pruned": self.store.prune_height}, 404
 
-    blockchain.mining_in_progress = True
-    
-    # Kopanie bloku
-    block = blockchain.proof_of_work()
+    def issue_challenges(self, values):
+        nodes = values.get("nodes") if isinstance(values, dict) else None
 
-    # Dodajemy blok do łańcucha
-    blockchain.create_block(block)
+        if not nodes or not isinstance(nodes, list):
+            return "No node to register", 400
 
-    blockchain.mining_in_progress = False
+        challenges = {}
 
-    # Ogłaszamy nowy blok
-    blockchain.announce_new_block(block)
+        for entry in nodes:
+            if not isinstance(entry, dict):
+                continue  # Wadliwe zgłoszenie pomijamy
 
-    return block
+            for node_id, node_data in entry.items():
+                if node_id in self.nodes:
+                    continue  # Już zarejestrowany
 
-@app.route('/chain', methods=['GET'])
-def get_chain():
-    response = {'length': len(blockchain.chain), 'dif': blockchain.difficulty, 'chain': blockchain.chain}
-    return response
+                # verify_challenge wczytuje klucz z node_data — bez niego zgłoszenie jest bezużyteczne
+                if not isinstance(node_data, dict) or not isinstance(node_data.get("public_key"), str):
+                    continue
 
-@app.route('/register_node', methods=['POST'])
-def register_node():
-    values = request.get_json()
-    nodes = values.get("nodes")
+                # Zgłoszenie przekazane przez peera może dojść po własnym zgłoszeniu noda —
+                # oczekujące wyzwanie dla tego samego klucza zwracamy, zamiast je nadpisać
+                pending = self.pending_challenges.setdefault(node_id, {
+                    "challenge": secrets.token_hex(16),
+                    "node_data": node_data
+                })
+                if pending["node_data"].get("public_key") != node_data.get("public_key"):
+                    pending = self.pending_challenges[node_id] = {
+                        "challenge": secrets.token_hex(16),
+                        "node_data": node_data
+                    }
+
+                challenges[node_id] = pending["challenge"]
+
+        return {
+            "message": "Challenge(s) issued",
+            "challenges": challenges
+        }, 200
+
+    def verify_challenge(self, values):
+        values = values if isinstance(values, dict) else {}
+        node_id = values.get("node_id")
+        signature_hex = values.get("signature")
+
+        if not node_id or node_id not in self.pending_challenges:
+            return "No challenge pending for this node_id", 400
+
+        challenge_data = self.pending_challenges[node_id]
+        challenge = challenge_data["challenge"]
+        node_data = challenge_data["node_data"]
+        public_key_pem = node_data["public_key"]
+
+        # Weryfikacja podpisu
+        try:
+            public_key = serialization.load_pem_public_key(public_key_pem.encode())
+            signature = bytes.fromhex(signature_hex)
 
-    if not nodes or not isinstance(nodes, list):
-        return "No node to register", 400
+            public_key.verify(
+                signature=signature,
+                data=challenge.encode(),
+                padding=padding.PSS(
+                    mgf=padding.MGF1(hashes.SHA256()),
+                    salt_length=padding.PSS.MAX_LENGTH
+                ),
+                algorithm=hashes.SHA256()
+            )
+        except Exception as e:
+            return {"message": "Verification failed", "error": str(e)}, 400
+
+        # Jeśli weryfikacja się udała — dodajemy node
+        self.nodes[node_id] = node_data
+        self.key_registry.add(node_id, public_key_pem, public_key)
+        self.pending_challenges.pop(node_id, None)
+
+        # Rozgłoszenie do innych node’ów
+        self.announce_new_node([{node_id: node_data}])
+
+        return {
+            "message": "Node verified and registered",
+            "all_nodes": self.nodes
+        }, 201
+
+    def sync_chain(self):
+        if self.replace_chain():
+            return {"message": "Blockchain update!"}, 200
+        return {"message": "Blockchain is already updated"}, 200
+
+    def receive_block(self, block, source):
+        # Pola używane przed walidacją hasha — bez nich accept_block zgłosiłby wyjątek (500)
+        if not isinstance(block, dict) or not is_hash_hex(block.get("hash")) or not isinstance(block.get("previous_hash"), str):
+            return "Invalid data", 400
+        if not isinstance(block.get("transactions"), list) or not all(isinstance(tx, dict) for tx in block["transactions"]):
+            return "Invalid data", 400
+
+        self.relay.mark_known(source, block.get("hash"))
+
+        response, status = self.accept_block(block)
+        if status == 201:
+            # Ogłaszamy hash bloku pozostałym peerom
+            self.announce_new_block(block, exclude=source)
+        return response, status
+
+    def stats(self):
+        return {
+            "signature_cache": self.signature_cache.stats(),
+            "broadcast": self.broadcaster.stats(),
+            "compact_blocks": self.compact_stats,
+            "mempool": self.mempool.stats(),
+            "block_tree": self.tree.stats(),
+            "pruning": {"depth": self.prune_depth, "height": self.store.prune_height}
+        }, 200
+
+    def receive_compact_block(self, values, source):
+        if not compact_valid(values):
+            return "Invalid data", 400
+
+        self.relay.mark_known(source, values["header"].get("hash"))
+
+        response, status = self.accept_compact_block(values)
+        if status == 201:
+            self.announce_new_block(self.get_previous_block(), exclude=source)
+        return response, status
+
+    def receive_block_transactions(self, values, source):
+        if not block_transactions_valid(values):
+            return "Invalid data", 400
+
+        response, status = self.accept_block_transactions(values)
+        if status == 201:
+            self.announce_new_block(self.get_previous_block(), exclude=source)
+        return response, status
+
+    def receive_inventory(self, values, source):
+        items = values.get("items") if isinstance(values, dict) else None
+        if not self.relay.inventory_valid(items):
+            return "Invalid data", 400
+
+        # Odpowiadamy listą obiektów, których nie mamy — nadawca prześle tylko je
+        return {"want": self.relay.handle_inv(source, items)}, 200
+
+    def block_by_hash(self, block_hash):
+        height = self.index.block_height(block_hash)
+        if height is None:
+            return {"message": "Nie znaleziono bloku"}, 404
+        try:
+            return {"height": height, "block": self.chain[height]}, 200
+        except IndexError:
+            return self.chain_changed()
+
+    def block_by_height(self, height):
+        if not 0 <= height < self.view.height:
+            return {"message": "Nie ma bloku na tej wysokości"}, 404
+        if self.is_pruned(height):
+            return {"message": "Blok przycięty", "pruned": self.store.prune_height}, 404
+        try:
+            return {"height": height, "block": self.chain[height]}, 200
+        except IndexError:
+            return self.chain_changed()
+
+    def transaction_lookup(self, tx_hash):
+        found = self.find_transaction(tx_hash)
+        if found is None:
+            return {"message": "Nie znaleziono transakcji"}, 404
+        return found, 200
+
+    def balance(self, node_id=None):
+        # Saldo dowolnego konta z ledgera; bez parametru — saldo tego noda, jak dotąd
+        if node_id:
+            view = self.view
+            return {
+                "node_id": node_id,
+                "balance": self.get_balance(node_id, view),
+                "temp_balance": self.get_temp_balance(node_id, view)
+            }, 200
+
+        return f"💰 Twój balans: {self.get_balance(self.node_id)} coins", 200
+
+    def history_page(self, node_id, cursor=None, limit=50):
+        limit = min(max(limit, 1), 500)
+
+        # Kursor "wysokość:pozycja" ostatniej transakcji z poprzedniej strony
+        before = None
+        if cursor:
+            try:
+                height, position = (int(part) for part in cursor.split(":"))
+            except ValueError:
+                return {"message": "Nieprawidłowy kursor"}, 400
+            before = (height, position)
 
-    challenges = {}
+        page = self.index.history(node_id, before, limit)
+        items = []
+        try:
+            for height, position in page:
+                block = self.chain[height]
+                items.append({
+                    "tx": block["transactions"][position],
+                    "height": height,
+                    "position": position,
+                    "block_hash": block["hash"],
+                    "timestamp": block["timestamp"]
+                })
+        except IndexError:
+            return self.chain_changed()
+
+        next_cursor = f"{page[-1][0]}:{page[-1][1]}" if len(page) == limit else None
+        return {"node_id": node_id, "history": items, "next_cursor": next_cursor}, 200
+
+    def receive_transaction(self, values, source):
+        required_fields = ['sender', 'receiver', 'amount', 'signature']
+        if not isinstance(values, dict) or not all(field in values for field in required_fields):
+            return 'Brak wymaganych pól', 400
+
+        # Dodajemy timestamp jeśli nie istnieje (czyli lokalna transakcja)
+        if 'timestamp' not in values:
+            values['timestamp'] = time.time()
+
+        tx = {field: values[field] for field in ['sender', 'receiver', 'amount', 'timestamp', 'signature']}
+        if not transaction_fields_valid(tx):
+            return 'Nieprawidłowe dane transakcji', 400
+        try:
+            bytes.fromhex(tx['signature'])
+        except ValueError:
+            return 'Nieprawidłowy podpis', 400
+        if tx['sender'] not in self.nodes:
+            return 'Nieznany nadawca', 400
+        self.relay.mark_known(source, transaction_id(tx))
 
-    for entry in nodes:
-        for node_id, node_data in entry.items():
-            if node_id in blockchain.nodes:
-                continue  # Już zarejestrowany
+        added = self.add_transaction(values['sender'], values['receiver'], values['amount'], values['signature'], values['timestamp'])
 
-            challenge = secrets.token_hex(16)
-            blockchain.pending_challenges[node_id] = {
-                "challenge": challenge,
-                "node_data": node_data
-            }
+        if not added:
+            return 'Transakcja już istnieje', 200
 
-            challenges[node_id] = challenge
+        # Rozgłaszamy tylko NOWĄ transakcję — pozostali peerzy dostają jej hash
+        self.announce_transaction(tx, exclude=source)
 
-    return {
-        "message": "Challenge(s) issued",
-        "challenges": challenges
-    }, 200
+        return 'Transakcja dodana do bloku', 201
 
-@app.route('/verify_node', methods=['POST'])
-def verify_node():
-    values = request.get_json()
-    node_id = values.get("node_id")
-    signature_hex = values.get("signature")
-
-    if not node_id or node_id not in blockchain.pending_challenges:
-        return "No challenge pending for this node_id", 400
-
-    challenge_data = blockchain.pending_challenges[node_id]
-    challenge = challenge_data["challenge"]
-    node_data = challenge_data["node_data"]
-    public_key_pem = node_data["public_key"]
-
-    # Weryfikacja podpisu
-    try:
-        public_key = serialization.load_pem_public_key(public_key_pem.encode())
-        signature = bytes.fromhex(signature_hex)
-
-        public_key.verify(
-            signature=signature,
-            data=challenge.encode(),
-            padding=padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            algorithm=hashes.SHA256()
-        )
-    except Exception as e:
-        return {"message": "Verification failed", "error": str(e)}, 400
 
-    # Jeśli weryfikacja się udała — dodajemy node
-    blockchain.nodes[node_id] = node_data
-    del blockchain.pending_challenges[node_id]
+app = Flask(__name__)
 
-    # Rozgłoszenie do innych node’ów
-    blockchain.announce_new_node([{node_id: node_data}])
+# Trasy są cienkie: logika żądań jest w metodach Blockchain, wspólnych z serwerem asyncio (aionode.py)
 
-    return {
-        "message": "Node verified and registered",
-        "all_nodes": blockchain.nodes
-    }, 201
+def read_payload(decode):
+    """Treść żądania: JSON albo format binarny (Content-Type: application/x-blockchain)."""
+    if request.mimetype == MEDIA_TYPE:
+        try:
+            return decode(request.get_data())
+        except CodecError:
+            return None
+    return request.get_json(silent=True)
 
-@app.route('/sync', methods=['GET'])
-def sync():
-    replaced = blockchain.replace_chain()
-    if replaced:
-        return {"message": "Blockchain update!"}
-    return {"message": "Blockchain is already updated"}
+@app.route('/mine', methods=['GET'])
+def mine_block():
+    return blockchain.mine()
 
-@app.route('/new_block', methods=['POST'])
-def new_block():
-    values = request.get_json()
-    if values is None:
-        return "Invalid data", 400
+@app.route('/mine/<job_id>', methods=['GET'])
+def mining_status(job_id):
+    return blockchain.mining_status(job_id)
 
-    block = values
-    previous_block = blockchain.get_previous_block()
+@app.route('/chain', methods=['GET'])
+def get_chain():
+    # Jeden odczyt widoku — długość, czubek i trudność pochodzą z tego samego stanu łańcucha
+    view = blockchain.view
+    start, stop = blockchain.chain_range(view, request.args.get("from", 0, type=int), request.args.get("limit", type=int))
 
-    # Kopia bloku bez pola hash do ponownego przeliczenia
-    block_copy = block.copy()
-    block_copy.pop("hash", None)
+    # Format binarny tylko na wyraźne życzenie klienta (Accept), domyślnie JSON
+    mimetype = request.accept_mimetypes.best_match(CHAIN_MIMETYPES) or "application/json"
 
-    if block['hash'] != blockchain.hash(block_copy):
-        return {"message": "Hash nieprawidłowy"}, 400
+    etag = blockchain.chain_etag(view, start, stop, mimetype)
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(blockchain.chain_chunks(view, start, stop, mimetype), mimetype=mimetype)
+    response.set_etag(etag)
+    response.vary.add("Accept")
+    return response
 
-    if block['hash'][:blockchain.difficulty] != '0' * blockchain.difficulty:
-        return {"message": "Blok nie spełnia trudności"}, 400
+@app.route('/headers', methods=['GET'])
+def get_headers():
+    return blockchain.headers_page(blockchain.view, request.args.get("from", 0, type=int), request.args.get("to", type=int))
 
-    if previous_block["hash"] != block["previous_hash"]:
-        return {"message": "Block refused"}, 400
+@app.route('/blocks', methods=['GET'])
+def get_blocks():
+    return blockchain.blocks_page(blockchain.view, request.args.get("from", 0, type=int), request.args.get("to", type=int))
 
-    # 🛡️ WALIDACJA TRANSAKCJI W BLOKU
-    temp_balances = {}
-    for tx in block['transactions']:
-        sender = tx.get('sender')
-        receiver = tx.get('receiver')
-        amount = tx.get('amount')
-        signature = tx.get('signature')
-        timestamp = tx.get('timestamp')
+@app.route('/register_node', methods=['POST'])
+def register_node():
+    return blockchain.issue_challenges(request.get_json(silent=True))
 
-        if not all([sender, receiver, amount, signature, timestamp]):
-            return {"message": "Transakcja zawiera niekompletne dane"}, 400
+@app.route('/verify_node', methods=['POST'])
+def verify_node():
+    return blockchain.verify_challenge(request.get_json(silent=True))
 
-        if sender == "*":
-            continue  # pomiń reward
+@app.route('/sync', methods=['GET'])
+def sync():
+    return blockchain.sync_chain()
 
-        # Tworzymy surowe dane transakcji bez podpisu
-        tx_data = json.dumps({
-            'sender': sender,
-            'receiver': receiver,
-            'amount': amount,
-            'timestamp': timestamp
-        }, sort_keys=True)
+@app.route('/new_block', methods=['POST'])
+def new_block():
+    return blockchain.receive_block(read_payload(decode_block), request.headers.get("X-Node-Address"))
 
-        # ✅ Weryfikacja podpisu
-        if not blockchain.verify_signature(sender, bytes.fromhex(signature), tx_data):
-            return {"message": f"Nieprawidłowy podpis dla transakcji od {sender}"}, 400
+@app.route('/stats', methods=['GET'])
+def get_stats():
+    return blockchain.stats()
 
-        # Oblicz tymczasowy balans na podstawie łańcucha
-        if sender not in temp_balances:
-            temp_balances[sender] = blockchain.get_balance(sender)
-        if receiver not in temp_balances:
-            temp_balances[receiver] = blockchain.get_balance(receiver)
+@app.route('/cmpctblock', methods=['POST'])
+def compact_block():
+    return blockchain.receive_compact_block(request.get_json(silent=True), request.headers.get("X-Node-Address"))
 
-        # Sprawdzenie czy nadawca ma środki
-        if temp_balances[sender] < amount:
-            return {"message": f"Niewystarczające środki u {sender}"}, 400
+@app.route('/blocktxn', methods=['POST'])
+def block_transactions():
+    return blockchain.receive_block_transactions(request.get_json(silent=True), request.headers.get("X-Node-Address"))
 
-        # Zaktualizuj tymczasowe salda
-        temp_balances[sender] -= amount
-        temp_balances[receiver] += amount
+@app.route('/inv', methods=['POST'])
+def inventory():
+    return blockchain.receive_inventory(request.get_json(silent=True), request.headers.get("X-Node-Address"))
 
-    # Jeśli wszystko OK, dodaj blok
-    blockchain.chain.append(block)
-    blockchain.transactions = []
-    blockchain.save_blockchain()
+@app.route('/proof/<tx_hash>', methods=['GET'])
+def transaction_proof(tx_hash):
+    return blockchain.transaction_proof(tx_hash)
 
-    return {"message": "Block accepted"}, 201
+@app.route('/block/<block_hash>', methods=['GET'])
+def get_block_by_hash(block_hash):
+    return blockchain.block_by_hash(block_hash)
+
+@app.route('/block/height/<int:height>', methods=['GET'])
+def get_block_by_height(height):
+    return blockchain.block_by_height(height)
+
+@app.route('/tx/<tx_hash>', methods=['GET'])
+def get_transaction(tx_hash):
+    return blockchain.transaction_lookup(tx_hash)
 
 @app.route('/nodes', methods=['GET'])
 def get_nodes():
@@ -520,35 +1438,15 @@ def get_nodes():
 
 @app.route('/balance', methods = ['GET'])
 def show_balance():
-    balance = blockchain.get_balance(blockchain.node_id)
-    return (f"💰 Twój balans: {balance} coins")
+    return blockchain.balance(request.args.get("node_id"))
 
+@app.route('/history/<node_id>', methods=['GET'])
+def show_history(node_id):
+    return blockchain.history_page(node_id, request.args.get("cursor"), request.args.get("limit", 50, type=int))
 
 @app.route('/transaction', methods=['POST'])
 def add_transaction():
-    values = request.get_json()
-    required_fields = ['sender', 'receiver', 'amount', 'signature']
-    if not all(field in values for field in required_fields):
-        return 'Brak wymaganych pól', 400
-
-    # Dodajemy timestamp jeśli nie istnieje (czyli lokalna transakcja)
-    if 'timestamp' not in values:
-        values['timestamp'] = time.time()
-
-    added = blockchain.add_transaction(values['sender'], values['receiver'], values['amount'], values['signature'], values['timestamp'])
-
-    if not added:
-        return 'Transakcja już istnieje', 200
-
-    # Rozgłaszamy tylko NOWĄ transakcję
-    for node_id, node_data in blockchain.nodes.items():
-        if node_data["ip"] != blockchain.node_address:
-            try:
-                requests.post(f"http://{node_data['ip']}/transaction", json=values)
-            except:
-                continue
-
-    return f'Transakcja dodana do bloku', 201
+    return blockchain.receive_transaction(read_payload(decode_transaction), request.headers.get("X-Node-Address"))
 
 
 node_id = "test"
@@ -605,12 +1503,19 @@ if __name__ == '__main__':
     print(f"🔑 Załadowano klucze: {key_name}")
 
 
-    blockchain = Blockchain(f"127.0.0.1:{port}", get_node_id_from_public_key(public_key), public_key, public_key_pem, load_known_nodes())
+    # Opcje po kluczu: "async" (serwer asyncio) i "prune=K" (węzeł przycięty do K ostatnich bloków)
+    options = sys.argv[3:]
+    prune_depth = next((int(option[len("prune="):]) for option in options if option.startswith("prune=")), None)
+
+    blockchain = Blockchain(f"127.0.0.1:{port}", get_node_id_from_public_key(public_key), public_key, public_key_pem, load_known_nodes(), prune_depth)
 
-    # 🔁 Uruchom Flask w osobnym wątku
-    flask_thread = threading.Thread(target=lambda: app.run(host='127.0.0.1', port=port))
-    flask_thread.daemon = True
-    flask_thread.start()
+    # 🔁 Uruchom serwer w osobnym wątku: Flask albo asyncio (python main.py PORT KLUCZ async)
+    if "async" in options:
+        server_thread = threading.Thread(target=lambda: run_server(blockchain, '127.0.0.1', int(port)))
+    else:
+        server_thread = threading.Thread(target=lambda: app.run(host='127.0.0.1', port=port))
+    server_thread.daemon = True
+    server_thread.start()
 
     while True:
         print(f"\nWitaj node: {blockchain.node_id}")
@@ -652,30 +1557,31 @@ if __name__ == '__main__':
                 print(signature)
 
                 added = blockchain.add_transaction(blockchain.node_id, receiver, amount, signature, timestamp)
-                print("✅ Transakcja dodana")
+                if added:
+                    print("✅ Transakcja dodana")
 
-                # Rozgłaszamy tylko NOWĄ transakcję
-                for node_id, node_data in blockchain.nodes.items():
-                    if node_data["ip"] != blockchain.node_address:
-                        print(node_id, node_data)
-                        try:
-                            requests.post(f"http://{node_data["ip"]}/transaction", json=blockchain.transactions[-1])
-                        except:
-                            continue
+                    # Rozgłaszamy tylko NOWĄ transakcję
+                    blockchain.announce_transaction({**json.loads(transaction_data), "signature": signature})
 
         elif choice == "2":
-            balance = blockchain.get_balance(blockchain.node_id)
-            temp_balance = blockchain.get_temp_balance(blockchain.node_id)
+            view = blockchain.view
+            balance = blockchain.get_balance(blockchain.node_id, view)
+            temp_balance = blockchain.get_temp_balance(blockchain.node_id, view)
             print(f"💰 Twój balans: {balance} coins")
             print(f"🧮 Tymczasowy balans (z nierozliczonymi transakcjami): {temp_balance}")
         elif choice == "3":
             print("⛏️  Kopanie bloku...")
-            mined_block = blockchain.proof_of_work()
-            blockchain.create_block(mined_block)
-            blockchain.announce_new_block(mined_block)
-            print(f"✅ Wykopano blok #{mined_block['index']}")
+            job_id = blockchain.start_mining_job()
+            while blockchain.mining_jobs[job_id]["status"] == "running":
+                time.sleep(0.1)
+
+            job = blockchain.mining_jobs[job_id]
+            if job["status"] == "done":
+                print(f"✅ Wykopano blok #{job['block']['index']}")
+            else:
+                print(f"❌ Kopanie nie powiodło się: {job.get('error')}")
         elif choice == "4":
-            for block in blockchain.chain:
+            for block in blockchain.chain[blockchain.store.prune_height:]:
                 print(json.dumps(block, indent=4))
         elif choice == "5":
             print("🌐 Lista nodów:")
@@ -689,6 +1595,5 @@ if __name__ == '__main__':
         else:
             print("❗ Nieznana opcja. Spróbuj ponownie.")
 
-
-atexit.register(blockchain.save_blockchain)
-atexit.register(blockchain.save_known_nodes)
\ No newline at end of file
+    atexit.register(blockchain.save_blockchain)
+    atexit.register(blockchain.save_known_nodes)
\ No newline at end of file
@@ -0,0 +1,179 @@
+import heapq
+import json
+import time
+from collections import OrderedDict, deque
+
+from ledger import FrozenOverlay, transaction_id
+
+
+class Mempool:
+    """Niezatwierdzone transakcje z indeksem po hashu i nadawcy oraz bieżącymi sumami oczekujących kwot."""
+
+    def __init__(self, max_count=10000, max_bytes=10 * 1024 * 1024, max_age=3 * 3600):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        # hash -> (transakcja, rozmiar w bajtach, czas przyjęcia); kolejność = wiek
+        self.by_hash = OrderedDict()
+        self.by_sender = {}
+        self.pending_credit = {}
+        self.pending_debit = {}
+        # Liczba transakcji dotyczących konta — przy zerze usuwamy sumy, żeby nie zbierać błędów zaokrągleń
+        self.account_refs = {}
+        self.total_bytes = 0
+        # Konta, których sumy zmieniły się od ostatniej publikacji
+        self.touched = set()
+        self.published = FrozenOverlay()
+
+    def __len__(self):
+        return len(self.by_hash)
+
+    def __contains__(self, tx_hash):
+        return tx_hash in self.by_hash
+
+    def get(self, tx_hash):
+        entry = self.by_hash.get(tx_hash)
+        return entry[0] if entry else None
+
+    def transactions(self):
+        return [entry[0] for entry in self.by_hash.values()]
+
+    def pending_delta(self, account):
+        return self.pending_credit.get(account, 0) - self.pending_debit.get(account, 0)
+
+    def snapshot(self):
+        """Niezmienny widok sum oczekujących kwot (konto -> przychody minus wydatki) dla czytelników.
+
+        Kopiuje tylko konta zmienione od poprzedniego wywołania.
+        """
+        if self.touched:
+            self.published = self.published.update({
+                account: self.pending_delta(account) if account in self.account_refs else None
+                for account in self.touched
+            })
+            self.touched = set()
+        return self.published
+
+    def add(self, tx, tx_hash=None, now=None):
+        """Dodaje transakcję i egzekwuje limity. Zwraca listę hashy usuniętych transakcji."""
+        tx_hash = tx_hash or transaction_id(tx)
+        if tx_hash in self.by_hash:
+            return []
+
+        now = time.time() if now is None else now
+        size = len(json.dumps(tx))
+        self.by_hash[tx_hash] = (tx, size, now)
+        self.by_sender.setdefault(tx["sender"], OrderedDict())[tx_hash] = True
+        self.total_bytes += size
+
+        # Ta sama semantyka co w get_balance: przy przelewie do siebie liczy się tylko przychód
+        self._ref(tx["receiver"], 1)
+        self.pending_credit[tx["receiver"]] = self.pending_credit.get(tx["receiver"], 0) + tx["amount"]
+        if tx["sender"] != tx["receiver"]:
+            self._ref(tx["sender"], 1)
+            self.pending_debit[tx["sender"]] = self.pending_debit.get(tx["sender"], 0) + tx["amount"]
+
+        return self.evict(now)
+
+    def remove(self, tx_hash):
+        entry = self.by_hash.pop(tx_hash, None)
+        if entry is None:
+            return None
+
+        tx, size, _ = entry
+        self.total_bytes -= size
+
+        sender_txs = self.by_sender.get(tx["sender"])
+        sender_txs.pop(tx_hash, None)
+        if not sender_txs:
+            del self.by_sender[tx["sender"]]
+
+        self.pending_credit[tx["receiver"]] = self.pending_credit.get(tx["receiver"], 0) - tx["amount"]
+        self._ref(tx["receiver"], -1)
+        if tx["sender"] != tx["receiver"]:
+            self.pending_debit[tx["sender"]] = self.pending_debit.get(tx["sender"], 0) - tx["amount"]
+            self._ref(tx["sender"], -1)
+        return tx
+
+    def _ref(self, account, delta):
+        self.touched.add(account)
+        count = self.account_refs.get(account, 0) + delta
+        if count > 0:
+            self.account_refs[account] = count
+        else:
+            self.account_refs.pop(account, None)
+            self.pending_credit.pop(account, None)
+            self.pending_debit.pop(account, None)
+
+    def evict(self, now=None):
+        """Usuwa przeterminowane transakcje, a potem najstarsze, dopóki nie zmieścimy się w limitach."""
+        now = time.time() if now is None else now
+        evicted = []
+
+        while self.by_hash:
+            tx_hash, (_, _, added) = next(iter(self.by_hash.items()))
+            over_limit = len(self.by_hash) > self.max_count or self.total_bytes > self.max_bytes
+            if not over_limit and now - added <= self.max_age:
+                break
+            self.remove(tx_hash)
+            evicted.append(tx_hash)
+        return evicted
+
+    def remove_confirmed(self, block):
+        """Usuwa z mempoola transakcje zatwierdzone w bloku."""
+        removed = []
+        for tx in block["transactions"]:
+            tx_hash = transaction_id(tx)
+            if self.remove(tx_hash) is not None:
+                removed.append(tx_hash)
+        return removed
+
+    def select(self, max_count, max_bytes, balance_of):
+        """Wybiera transakcje do bloku: najstarsze najpierw, u każdego nadawcy w kolejności znaczników czasu.
+
+        Pomija transakcje bez pokrycia w saldzie; gdy transakcji nadawcy nie da się dołączyć,
+        jego późniejsze też czekają na kolejny blok. Wynik zależy tylko od zawartości mempoola.
+        Przeterminowane transakcje usuwa przed wyborem — nie trafią do bloku.
+        """
+        self.evict()
+        queues = {}
+        for sender, hashes in self.by_sender.items():
+            queues[sender] = deque(sorted(hashes, key=lambda h: (self.by_hash[h][0]["timestamp"], h)))
+
+        heap = [(self.by_hash[q[0]][0]["timestamp"], q[0], sender) for sender, q in queues.items()]
+        heapq.heapify(heap)
+
+        selected = []
+        size = 0
+        balances = {}
+        while heap and len(selected) < max_count:
+            _, tx_hash, sender = heapq.heappop(heap)
+            tx, tx_size, _ = self.by_hash[tx_hash]
+            queue = queues[sender]
+            queue.popleft()
+
+            if sender not in balances:
+                balances[sender] = balance_of(sender)
+            if size + tx_size > max_bytes or balances[sender] < tx["amount"]:
+                continue
+
+            if tx["receiver"] not in balances:
+                balances[tx["receiver"]] = balance_of(tx["receiver"])
+            balances[sender] -= tx["amount"]
+            balances[tx["receiver"]] += tx["amount"]
+            selected.append(tx)
+            size += tx_size
+
+            if queue:
+                heapq.heappush(heap, (self.by_hash[queue[0]][0]["timestamp"], queue[0], sender))
+        return selected
+
+    def stats(self):
+        return {
+            "count": len(self.by_hash),
+            "bytes": self.total_bytes,
+            "max_count": self.max_count,
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age
+        }
@@ -0,0 +1,43 @@
+import hashlib
+import json
+
+EMPTY_ROOT = "00" * 32
+
+
+def tx_leaf(tx):
+    """Liść drzewa: hash pełnej transakcji (z podpisem), żeby nagłówek wiązał też podpisy."""
+    return hashlib.sha256(json.dumps(tx, sort_keys=True).encode()).digest()
+
+
+def _parent(left, right):
+    return hashlib.sha256(left + right).digest()
+
+
+def _next_level(level):
+    # Nieparzysty ostatni węzeł przechodzi wyżej bez zmian (bez duplikowania — inaczej [a, b, c] i [a, b, c, c] miałyby ten sam korzeń)
+    parents = [_parent(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        parents.append(level[-1])
+    return parents
+
+
+def merkle_root(leaves):
+    if not leaves:
+        return EMPTY_ROOT
+    level = list(leaves)
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0].hex()
+
+
+def merkle_branch(leaves, index):
+    """Ścieżka od liścia do korzenia: lista sąsiadów {"hash", "side"}, gdzie side to strona sąsiada."""
+    branch = []
+    level = list(leaves)
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            branch.append({"hash": level[sibling].hex(), "side": "left" if sibling < index else "right"})
+        level = _next_level(level)
+        index //= 2
+    return branch
@@ -0,0 +1,130 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+
+from header import HEADER_VERSION, NONCE_FORMAT, encode_header, transactions_root
+
+
+class BlockTemplate:
+    """Blok gotowy do kopania: stały nagłówek, zmienia się tylko proof (nonce)."""
+
+    def __init__(self, block):
+        self.block = block
+
+        # Nonce to ostatnie 8 bajtów nagłówka v2 — prefiks jest stały dla całego szablonu
+        self.prefix = encode_header(block)[:-NONCE_FORMAT.size]
+
+        # Stan SHA-256 po przetworzeniu prefiksu — kopiujemy go przy każdej próbie
+        self.midstate = hashlib.sha256(self.prefix)
+
+    def hash_for(self, nonce):
+        h = self.midstate.copy()
+        h.update(NONCE_FORMAT.pack(nonce))
+        return h
+
+    def finalize(self, nonce):
+        block = dict(self.block)
+        block["proof"] = nonce
+        block["hash"] = self.hash_for(nonce).hexdigest()
+        return block
+
+
+def build_block_template(previous_block, transactions, coinbase):
+    transactions = transactions + [coinbase]
+    block = {
+        'version': HEADER_VERSION,
+        'index': previous_block['index'] + 1,
+        'timestamp': time.time(),
+        'transactions': transactions,
+        'merkle_root': transactions_root(transactions),
+        'proof': 0,
+        'previous_hash': previous_block['hash']
+    }
+    return BlockTemplate(block)
+
+
+def search_nonce(template, target, start=0, step=1, stop_event=None, check_every=5000):
+    """Szuka nonce, dla którego hash bloku nie przekracza `target`.
+
+    Zwraca nonce albo None, gdy `stop_event` zostanie ustawiony.
+    """
+    return _search(template.midstate, target, start, step, stop_event, check_every)
+
+
+def _search(midstate, target, start, step, stop_event, check_every):
+    nonce = start
+    pack = NONCE_FORMAT.pack
+
+    while True:
+        for _ in range(check_every):
+            h = midstate.copy()
+            h.update(pack(nonce))
+            if h.digest() <= target:
+                return nonce
+            nonce += step
+
+        if stop_event is not None and stop_event.is_set():
+            return None
+
+
+# --- kopanie wieloprocesowe ---
+
+_worker_stop_event = None
+
+
+def _init_worker(stop_event):
+    global _worker_stop_event
+    _worker_stop_event = stop_event
+
+
+def _search_worker(prefix, target, start, step):
+    return _search(hashlib.sha256(prefix), target, start, step, _worker_stop_event, 5000)
+
+
+class ParallelMiner:
+    """Przeszukuje przestrzeń nonce w puli procesów (po jednym na rdzeń) z możliwością przerwania."""
+
+    def __init__(self, processes=None):
+        self.processes = processes or os.cpu_count() or 1
+        ctx = multiprocessing.get_context("spawn")
+        self.stop_event = ctx.Event()
+        self.pool = ctx.Pool(self.processes, initializer=_init_worker, initargs=(self.stop_event,))
+        self.lock = threading.Lock()
+
+    def search(self, template, target, is_current=lambda: True):
+        """Zwraca znaleziony nonce albo None, gdy kopanie przerwano przez cancel()."""
+        with self.lock:
+            self.stop_event.clear()
+            # Czubek mógł się zmienić, zanim wyczyściliśmy flagę przerwania
+            if not is_current():
+                return None
+
+            found = []
+
+            def on_result(nonce):
+                if nonce is not None and not found:
+                    found.append(nonce)
+                    self.stop_event.set()
+
+            # Proces i sprawdza nonce i, i + n, i + 2n, ...
+            results = [
+                self.pool.apply_async(
+                    _search_worker,
+                    (template.prefix, target, i, self.processes),
+                    callback=on_result
+                )
+                for i in range(self.processes)
+            ]
+            for result in results:
+                result.wait()
+
+            return found[0] if found else None
+
+    def cancel(self):
+        self.stop_event.set()
+
+    def close(self):
+        self.cancel()
+        self.pool.terminate()
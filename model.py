@@ -0,0 +1,102 @@
+import json
+
+from codec import BLOCK_FIELDS, TX_FIELDS
+
+# Zwarta reprezentacja bloków i transakcji w pamięci: obiekty ze __slots__ zamiast słowników,
+# napisy hex (hashe, adresy, podpisy) jako surowe bajty, kwoty i czasy jako liczby.
+# Konwersja z i do kształtu JSON jest bezstratna: bajty powstają tylko z napisów hex, które po
+# `.hex()` dają ten sam napis, brakujące pola zostają nieustawione, a pola spoza schematu trafiają do `extra`.
+
+_TX_KEYS = frozenset(TX_FIELDS)
+_BLOCK_KEYS = frozenset(BLOCK_FIELDS + ("transactions",))
+_MISSING = object()
+
+
+def _pack(value):
+    if isinstance(value, str) and value and len(value) % 2 == 0:
+        try:
+            raw = bytes.fromhex(value)
+        except ValueError:
+            return value
+        # Tylko małe litery bez spacji — inaczej nie odtworzylibyśmy tego samego napisu
+        if raw.hex() == value:
+            return raw
+    return value
+
+
+def _unpack(value):
+    # JSON nie ma typu bajtowego, więc bajty zawsze oznaczają spakowany napis hex
+    return value.hex() if isinstance(value, bytes) else value
+
+
+class Transaction:
+    """Transakcja w pamięci; `from_dict` / `to_dict` przechodzą z i do kształtu JSON."""
+
+    __slots__ = TX_FIELDS + ("extra",)
+
+    @classmethod
+    def from_dict(cls, tx):
+        self = cls()
+        for field in TX_FIELDS:
+            if field in tx:
+                setattr(self, field, _pack(tx[field]))
+        self.extra = {k: v for k, v in tx.items() if k not in _TX_KEYS} or None
+        return self
+
+    def to_dict(self):
+        tx = {}
+        for field in TX_FIELDS:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                tx[field] = _unpack(value)
+        if self.extra:
+            tx.update(self.extra)
+        return tx
+
+
+class Block:
+    """Blok w pamięci z transakcjami jako krotką obiektów Transaction."""
+
+    __slots__ = BLOCK_FIELDS + ("transactions", "extra")
+
+    @classmethod
+    def from_dict(cls, block):
+        self = cls()
+        for field in BLOCK_FIELDS:
+            if field in block:
+                setattr(self, field, _pack(block[field]))
+
+        extra = {k: v for k, v in block.items() if k not in _BLOCK_KEYS}
+        transactions = block.get("transactions")
+        if isinstance(transactions, list) and all(isinstance(tx, dict) for tx in transactions):
+            self.transactions = tuple(Transaction.from_dict(tx) for tx in transactions)
+        elif "transactions" in block:
+            # Spoza schematu (np. blok odrzucany przy walidacji) — przechowujemy bez zmian
+            extra["transactions"] = transactions
+        self.extra = extra or None
+        return self
+
+    @classmethod
+    def from_json(cls, raw):
+        return cls.from_dict(json.loads(raw))
+
+    def get(self, field, default=None):
+        """Pojedyncze pole w kształcie JSON, bez budowania całego słownika."""
+        if field in _BLOCK_KEYS and field != "transactions":
+            value = getattr(self, field, _MISSING)
+            return default if value is _MISSING else _unpack(value)
+        return self.to_dict().get(field, default)
+
+    def to_dict(self):
+        block = {}
+        for field in BLOCK_FIELDS:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                block[field] = _unpack(value)
+        transactions = getattr(self, "transactions", _MISSING)
+        if transactions is not _MISSING:
+            block["transactions"] = [tx.to_dict() for tx in transactions]
+        if self.extra:
+            block.update(self.extra)
+        return block
+
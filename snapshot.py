@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+
+SNAPSHOT_VERSION = 1
+
+# Okresowe snapshoty (co `snapshot_interval` bloków) i zapisywane przy zamknięciu noda mają osobne pliki
+# i osobne limity — częste restarty nie wypierają starszych okresowych, od których liczymy okno reorganizacji
+CHECKPOINT_PREFIX = "snapshot_"
+SHUTDOWN_PREFIX = "shutdown_"
+
+
+def _checksum(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _snapshot_path(directory, height, prefix):
+    return os.path.join(directory, f"{prefix}{height:010d}.json")
+
+
+def _height(name):
+    return int(name[name.index("_") + 1:-len(".json")])
+
+
+def list_snapshots(directory, prefixes=(CHECKPOINT_PREFIX, SHUTDOWN_PREFIX)):
+    """Nazwy plików snapshotów podanych rodzajów, od najwyższego."""
+    if not os.path.isdir(directory):
+        return []
+    names = [n for n in os.listdir(directory) if n.startswith(prefixes) and n.endswith(".json")]
+    return sorted(names, key=_height, reverse=True)
+
+
+def snapshot_heights(directory):
+    """Wysokości okresowych snapshotów (bez zapisanych przy zamknięciu)."""
+    return [_height(name) for name in list_snapshots(directory, (CHECKPOINT_PREFIX,))]
+
+
+def write_snapshot(directory, ledger, height, tip_hash, keep=2, targets=None, prefix=CHECKPOINT_PREFIX):
+    """Zapisuje stan pochodny (salda, hashe transakcji, czubek łańcucha) na wysokości `height`."""
+    os.makedirs(directory, exist_ok=True)
+    payload = {
+        "version": SNAPSHOT_VERSION,
+        "height": height,
+        "tip_hash": tip_hash,
+        **ledger.to_state()
+    }
+    # Harmonogram celów PoW — wczytany po starcie nie wymaga przejścia po wszystkich blokach
+    if targets is not None:
+        payload["targets"] = targets
+    payload["checksum"] = _checksum(payload)
+
+    path = _snapshot_path(directory, height, prefix)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(payload, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    # Zostawiamy tylko kilka najnowszych snapshotów tego samego rodzaju
+    for name in list_snapshots(directory, (prefix,))[keep:]:
+        os.remove(os.path.join(directory, name))
+
+
+def load_latest_snapshot(directory, store, max_height=None):
+    """Zwraca najnowszy snapshot zgodny z łańcuchem w magazynie (nie wyższy niż `max_height`) albo None."""
+    for name in list_snapshots(directory):
+        try:
+            with open(os.path.join(directory, name), "r") as f:
+                payload = json.load(f)
+        except ValueError:
+            continue
+
+        checksum = payload.pop("checksum", None)
+        if payload.get("version") != SNAPSHOT_VERSION or checksum != _checksum(payload):
+            print(f"⚠️ Pomijam uszkodzony snapshot {name}")
+            continue
+
+        # Snapshot musi wskazywać na blok, który nadal jest w naszym łańcuchu
+        height = payload["height"]
+        if max_height is not None and height > max_height:
+            continue
+        if not 0 < height <= len(store) or store.hash_at(height - 1) != payload["tip_hash"]:
+            continue
+
+        return payload
+    return None
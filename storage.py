@@ -0,0 +1,440 @@
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+# Rekord indeksu: numer segmentu, offset, długość rekordu bloku, hash bloku
+INDEX_RECORD = struct.Struct("<IQI64s")
+SEGMENT_SIZE = 64 * 1024 * 1024
+# Węzeł przycięty usuwa tylko całe segmenty — mniejsze pozwalają trzymać niewiele ponad ostatnie bloki
+PRUNED_SEGMENT_SIZE = 4 * 1024 * 1024
+FSYNC_POLICIES = ("always", "interval", "never")
+
+
+def _fsync_dir(path):
+    # Na Windowsie katalogów nie da się otworzyć do fsync — wtedy pomijamy
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class ChainStore:
+    """Dopisywany przyrostowo magazyn bloków: segmenty z rekordami JSON + indeks offsetów."""
+
+    def __init__(self, path="chaindata", fsync_policy="interval", fsync_interval=100, segment_size=SEGMENT_SIZE,
+                 raw_cache_size=1024):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Nieznana polityka fsync: {fsync_policy}")
+
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self.segment_size = segment_size
+        self.lock = threading.RLock()
+        self._unsynced = 0
+        self._readers = {}
+        self._hash_index = None
+        # Zserializowane bloki (wysokość -> bajty JSON) — bloki są niezmienne, więc można je podawać wprost
+        self.raw_cache = OrderedDict()
+        self.raw_cache_size = raw_cache_size
+
+        os.makedirs(path, exist_ok=True)
+        self.index_path = os.path.join(path, "index.dat")
+        self.journal_path = os.path.join(path, "reorg.journal")
+        # Tryb przycięty: bloki poniżej tej wysokości usunięto z dysku (indeks offsetów i hashe zostają)
+        self.prune_path = os.path.join(path, "pruned.dat")
+        self.prune_height = 0
+        if os.path.exists(self.prune_path):
+            with open(self.prune_path, "r") as f:
+                self.prune_height = int(f.read() or 0)
+
+        self._open()
+        self._replay_journal()
+
+    # --- pliki ---
+
+    def _segment_path(self, segment):
+        return os.path.join(self.path, f"blk{segment:05d}.dat")
+
+    def _open(self):
+        if not os.path.exists(self.index_path):
+            open(self.index_path, "wb").close()
+
+        # Ucinamy niepełny rekord indeksu po przerwanym zapisie
+        size = os.path.getsize(self.index_path)
+        count = size // INDEX_RECORD.size
+        if size != count * INDEX_RECORD.size:
+            with open(self.index_path, "r+b") as f:
+                f.truncate(count * INDEX_RECORD.size)
+
+        # Odrzucamy wpisy indeksu wskazujące poza koniec segmentu
+        while count:
+            segment, offset, length, _ = self._read_index(count - 1)
+            segment_path = self._segment_path(segment)
+            if os.path.exists(segment_path) and os.path.getsize(segment_path) >= offset + length:
+                break
+            count -= 1
+
+        with open(self.index_path, "r+b") as f:
+            f.truncate(count * INDEX_RECORD.size)
+        self.height = count
+
+        # Segment za ostatnim wpisem indeksu jest osierocony — ucinamy go
+        if count:
+            segment, offset, length, _ = self._read_index(count - 1)
+            self._truncate_segments(segment, offset + length)
+        else:
+            self._truncate_segments(0, 0)
+
+        self.index_file = open(self.index_path, "ab")
+        self._open_segment_for_append()
+
+    def _open_segment_for_append(self):
+        segment = 0
+        if self.height:
+            segment = self._read_index(self.height - 1)[0]
+        self.segment = segment
+        self.segment_file = open(self._segment_path(segment), "ab")
+
+    def _truncate_segments(self, segment, offset):
+        path = self._segment_path(segment)
+        if os.path.exists(path):
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+
+        # Usuwamy wszystkie późniejsze segmenty
+        later = segment + 1
+        while os.path.exists(self._segment_path(later)):
+            os.remove(self._segment_path(later))
+            later += 1
+
+    def _read_index(self, height):
+        with open(self.index_path, "rb") as f:
+            f.seek(height * INDEX_RECORD.size)
+            return INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))
+
+    def _reader(self, segment):
+        if segment not in self._readers:
+            self._readers[segment] = open(self._segment_path(segment), "rb")
+        return self._readers[segment]
+
+    def _close_readers(self):
+        for f in self._readers.values():
+            f.close()
+        self._readers = {}
+
+    # --- zapis ---
+
+    def append(self, block):
+        with self.lock:
+            self._append(block)
+            self._unsynced += 1
+            if self.fsync_policy == "always" or (
+                self.fsync_policy == "interval" and self._unsynced >= self.fsync_interval
+            ):
+                self.sync()
+
+    def _append(self, block):
+        record = (json.dumps(block) + "\n").encode()
+
+        offset = self.segment_file.tell()
+        if offset and offset + len(record) > self.segment_size:
+            self.segment_file.flush()
+            os.fsync(self.segment_file.fileno())
+            self.segment_file.close()
+            self.segment += 1
+            self.segment_file = open(self._segment_path(self.segment), "ab")
+            offset = 0
+
+        # Najpierw dane, potem indeks — wpis indeksu nigdy nie wskazuje na niezapisany blok
+        self.segment_file.write(record)
+        self.segment_file.flush()
+        self.index_file.write(INDEX_RECORD.pack(self.segment, offset, len(record), block["hash"].encode()))
+        self.index_file.flush()
+
+        if self._hash_index is not None:
+            self._hash_index[block["hash"]] = self.height
+        self._cache_raw(self.height, record[:-1])
+        self.height += 1
+
+    def sync(self):
+        with self.lock:
+            self.segment_file.flush()
+            self.index_file.flush()
+            os.fsync(self.segment_file.fileno())
+            os.fsync(self.index_file.fileno())
+            self._unsynced = 0
+
+    def truncate(self, height):
+        """Usuwa bloki od wysokości `height` wzwyż."""
+        with self.lock:
+            if height >= self.height:
+                return
+
+            self.segment_file.close()
+            self.index_file.close()
+            self._close_readers()
+
+            if height:
+                segment, offset, length, _ = self._read_index(height - 1)
+                self._truncate_segments(segment, offset + length)
+            else:
+                self._truncate_segments(0, 0)
+
+            with open(self.index_path, "r+b") as f:
+                f.truncate(height * INDEX_RECORD.size)
+
+            if self._hash_index is not None:
+                self._hash_index = {h: i for h, i in self._hash_index.items() if i < height}
+            self.raw_cache = OrderedDict((h, raw) for h, raw in self.raw_cache.items() if h < height)
+            self.height = height
+
+            self.index_file = open(self.index_path, "ab")
+            self._open_segment_for_append()
+
+    def prune(self, height):
+        """Usuwa bloki poniżej `height`: z dysku znikają segmenty zawierające wyłącznie takie bloki."""
+        with self.lock:
+            height = min(height, self.height)
+            if height <= self.prune_height:
+                return
+
+            # Najpierw trwały zapis granicy — po awarii nikt nie sięgnie do usuniętego segmentu
+            tmp_path = self.prune_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(str(height))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.prune_path)
+            self.prune_height = height
+
+            # Segment z pierwszym zachowanym blokiem zostaje, wcześniejsze usuwamy w całości
+            keep = self._read_index(height)[0] if height < self.height else self.segment
+            for segment in [s for s in self._readers if s < keep]:
+                self._readers.pop(segment).close()
+            for segment in range(keep):
+                if os.path.exists(self._segment_path(segment)):
+                    os.remove(self._segment_path(segment))
+
+            if self._hash_index is not None:
+                self._hash_index = {h: i for h, i in self._hash_index.items() if i >= height}
+            self.raw_cache = OrderedDict((h, raw) for h, raw in self.raw_cache.items() if h >= height)
+
+    def replace_tail(self, fork_height, blocks):
+        """Atomowo podmienia bloki od `fork_height` na `blocks` (reorganizacja łańcucha)."""
+        with self.lock:
+            # Dziennik zapisujemy w całości przed zmianą danych — po awarii odtwarzamy go przy starcie
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"fork_height": fork_height, "blocks": blocks}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.journal_path)
+            _fsync_dir(self.path)
+
+            self._apply_journal(fork_height, blocks)
+
+    def _apply_journal(self, fork_height, blocks):
+        self.truncate(fork_height)
+        for block in blocks:
+            self._append(block)
+        self.sync()
+        os.remove(self.journal_path)
+        _fsync_dir(self.path)
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, "r") as f:
+                journal = json.load(f)
+        except ValueError:
+            # Niepełny dziennik oznacza, że reorganizacja się nie zaczęła
+            os.remove(self.journal_path)
+            return
+        print(f"♻️ Dokańczam przerwaną reorganizację od wysokości {journal['fork_height']}")
+        self._apply_journal(journal["fork_height"], journal["blocks"])
+
+    # --- odczyt ---
+
+    def __len__(self):
+        return self.height
+
+    def _cache_raw(self, height, raw):
+        self.raw_cache[height] = raw
+        self.raw_cache.move_to_end(height)
+        while len(self.raw_cache) > self.raw_cache_size:
+            self.raw_cache.popitem(last=False)
+
+    def get_raw(self, height):
+        """Zwraca blok jako bajty JSON, bez parsowania."""
+        with self.lock:
+            if height < 0:
+                height += self.height
+            if not 0 <= height < self.height:
+                raise IndexError("block height out of range")
+            if height < self.prune_height:
+                raise IndexError("block pruned")
+            if height in self.raw_cache:
+                self.raw_cache.move_to_end(height)
+                return self.raw_cache[height]
+            raw = self._read_raw(self._read_index(height))
+            self._cache_raw(height, raw)
+            return raw
+
+    def _read_raw(self, record):
+        segment, offset, length, _ = record
+        f = self._reader(segment)
+        f.seek(offset)
+        return f.read(length).rstrip(b"\n")
+
+    def get(self, height):
+        return json.loads(self.get_raw(height))
+
+    def hash_at(self, height):
+        with self.lock:
+            if height < 0:
+                height += self.height
+            if not 0 <= height < self.height:
+                raise IndexError("block height out of range")
+            return self._read_index(height)[3].rstrip(b"\0").decode()
+
+    def height_of(self, block_hash):
+        with self.lock:
+            if self._hash_index is None:
+                self._hash_index = {}
+                # Tylko zachowane bloki — po przycięciu pamięć nie rośnie z wysokością łańcucha
+                with open(self.index_path, "rb") as f:
+                    f.seek(self.prune_height * INDEX_RECORD.size)
+                    data = f.read((self.height - self.prune_height) * INDEX_RECORD.size)
+                for height, (_, _, _, raw_hash) in enumerate(INDEX_RECORD.iter_unpack(data), self.prune_height):
+                    self._hash_index[raw_hash.rstrip(b"\0").decode()] = height
+            return self._hash_index.get(block_hash)
+
+    def get_by_hash(self, block_hash):
+        height = self.height_of(block_hash)
+        return None if height is None else self.get(height)
+
+    def iter_blocks(self, start=0, stop=None):
+        for raw in self.iter_raw(start, stop):
+            yield json.loads(raw)
+
+    def iter_raw(self, start=0, stop=None, batch=64):
+        """Bloki jako bajty JSON, czytane paczkami pod blokadą (pisarze czekają najwyżej na jedną paczkę).
+
+        Gdy w trakcie odczytu reorganizacja podmieni bloki z zakresu albo przycięcie je usunie,
+        zgłaszamy IndexError — odbiorca nie dostanie mieszanki dwóch gałęzi.
+        """
+        with self.lock:
+            stop = self.height if stop is None else min(stop, self.height)
+            if start >= stop:
+                return
+            if start < self.prune_height:
+                raise IndexError("block pruned")
+            # Hash ostatniego bloku zakresu wiąże wszystkie wcześniejsze (przez previous_hash)
+            last_hash = self._read_index(stop - 1)[3]
+
+        for first in range(start, stop, batch):
+            with self.lock:
+                if first < self.prune_height or stop > self.height or self._read_index(stop - 1)[3] != last_hash:
+                    raise IndexError("chain changed while reading")
+                with open(self.index_path, "rb") as f:
+                    f.seek(first * INDEX_RECORD.size)
+                    records = INDEX_RECORD.iter_unpack(f.read((min(stop, first + batch) - first) * INDEX_RECORD.size))
+                    raws = [self.raw_cache.get(height) or self._read_raw(record) for height, record in enumerate(records, first)]
+            yield from raws
+
+    def close(self):
+        with self.lock:
+            self.sync()
+            self.segment_file.close()
+            self.index_file.close()
+            self._close_readers()
+
+    # --- migracja ---
+
+    def migrate_from_json(self, file_path="blockchain.json"):
+        """Jednorazowo przenosi łańcuch z dawnego blockchain.json do pustego magazynu."""
+        if self.height or not os.path.exists(file_path):
+            return False
+
+        with open(file_path, "r") as file:
+            chain = json.load(file)
+
+        with self.lock:
+            for block in chain:
+                self._append(block)
+            self.sync()
+        print(f"📦 Przeniesiono {len(chain)} bloków z {file_path} do {self.path}")
+        return True
+
+
+class StoredChain:
+    """Widok łańcucha zachowujący się jak lista, ale czytający bloki z magazynu na żądanie."""
+
+    def __init__(self, store, cache_size=256):
+        self.store = store
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        # Z widoku czytają równolegle wątki żądań — pamięć podręczna wymaga własnej blokady
+        self.lock = threading.Lock()
+        # Zmienia się przy podmianie końcówki — blok odczytany przed podmianą nie trafi już do pamięci podręcznej
+        self.generation = 0
+
+    def __len__(self):
+        return len(self.store)
+
+    def __bool__(self):
+        return len(self.store) > 0
+
+    def __iter__(self):
+        return self.store.iter_blocks()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self.store))
+            blocks = list(self.store.iter_blocks(start, stop)) if start < stop else []
+            return blocks[::step] if step != 1 else blocks
+
+        height = key + len(self.store) if key < 0 else key
+        with self.lock:
+            block = self.cache.get(height)
+            if block is not None:
+                self.cache.move_to_end(height)
+                return block
+            generation = self.generation
+
+        block = self.store.get(height)
+        self._remember(height, block, generation)
+        return block
+
+    def _remember(self, height, block, generation=None):
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.cache[height] = block
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def append(self, block):
+        self.store.append(block)
+        self._remember(len(self.store) - 1, block)
+
+    def prune(self, height):
+        self.store.prune(height)
+        with self.lock:
+            self.cache = OrderedDict((h, b) for h, b in self.cache.items() if h >= height)
+
+    def replace_tail(self, fork_height, blocks):
+        self.store.replace_tail(fork_height, blocks)
+        with self.lock:
+            self.cache = OrderedDict((h, b) for h, b in self.cache.items() if h < fork_height)
+            self.generation += 1
@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.exceptions import InvalidSignature
+
+# Sparsowane klucze w procesie roboczym (PEM -> obiekt klucza)
+_worker_keys = {}
+
+
+def _verify(public_key, signature, data):
+    try:
+        public_key.verify(
+            signature,
+            data,
+            padding.PSS(mgf=padding.MGF1(hashes.SHA256()), salt_length=padding.PSS.MAX_LENGTH),
+            hashes.SHA256()
+        )
+        return True
+    except InvalidSignature:
+        return False
+
+
+def _verify_chunk(items):
+    """Zwraca pozycję pierwszego błędnego podpisu w paczce albo None."""
+    for position, (public_key_pem, signature, data) in enumerate(items):
+        public_key = _worker_keys.get(public_key_pem)
+        if public_key is None:
+            try:
+                public_key = serialization.load_pem_public_key(public_key_pem.encode('utf-8'))
+            except ValueError:
+                return position
+            _worker_keys[public_key_pem] = public_key
+        if not _verify(public_key, signature, data):
+            return position
+    return None
+
+
+class BatchVerifier:
+    """Weryfikuje paczki podpisów RSA-PSS równolegle w puli procesów."""
+
+    def __init__(self, processes=None, chunk_size=32, min_parallel=64):
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        # Małe paczki sprawdzamy w bieżącym wątku — narzut puli byłby większy niż zysk
+        self.min_parallel = min_parallel
+        self.executor = None
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.executor
+
+    def verify(self, items, key_lookup=None):
+        """Sprawdza listę (node_id, public_key_pem, signature, data).
+
+        Zwraca indeks pierwszego elementu z błędnym podpisem albo None, gdy wszystkie są poprawne.
+        """
+        if self.processes == 1 or len(items) < self.min_parallel:
+            for position, (node_id, public_key_pem, signature, data) in enumerate(items):
+                try:
+                    public_key = key_lookup(node_id, public_key_pem) if key_lookup else None
+                except ValueError:
+                    return position
+                if public_key is None:
+                    if _verify_chunk([(public_key_pem, signature, data)]) is not None:
+                        return position
+                elif not _verify(public_key, signature, data):
+                    return position
+            return None
+
+        executor = self._get_executor()
+        chunks = [
+            [(pem, signature, data) for _, pem, signature, data in items[i:i + self.chunk_size]]
+            for i in range(0, len(items), self.chunk_size)
+        ]
+        futures = [executor.submit(_verify_chunk, chunk) for chunk in chunks]
+
+        # Wyniki odbieramy po kolei, żeby zwrócić pierwszy błąd; resztę paczek anulujemy
+        for n, future in enumerate(futures):
+            bad = future.result()
+            if bad is not None:
+                for pending in futures[n + 1:]:
+                    pending.cancel()
+                return n * self.chunk_size + bad
+        return None
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SignatureCache:
+    """Ograniczony cache (LRU) par (hash transakcji, podpis), które już przeszły weryfikację."""
+
+    def __init__(self, max_size=100000):
+        self.entries = OrderedDict()
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, tx_hash, signature):
+        with self.lock:
+            self.entries[(tx_hash, signature)] = True
+            self.entries.move_to_end((tx_hash, signature))
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def contains(self, tx_hash, signature):
+        key = (tx_hash, signature)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }